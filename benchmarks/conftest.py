@@ -0,0 +1,180 @@
+"""Benchmark configuration for ``ipyprofiler``.
+
+Run with ``pytest benchmarks``: each benchmark is timed over several rounds, then
+run once more under ``tracemalloc`` for its peak memory. Results are written to
+``build/reports/benchmarks/results.json``, and may be compared with an earlier run
+with ``--bench-baseline``.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import site
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from ipyprofiler.constants import UTF8
+from tests.conftest import synthetic_profile
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+REPORT = ROOT / "build/reports/benchmarks/results.json"
+
+#: the number of events in each synthetic profile, by id
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+#: the number of distinct frames in each synthetic profile
+N_FRAMES = 2_000
+#: the longest a benchmark keeps adding rounds, in seconds
+MIN_TIME = 1.0
+MAX_ROUNDS = 20
+
+RESULTS: list[dict[str, Any]] = []
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add benchmark options."""
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--bench-sizes",
+        default=",".join(SIZES),
+        help=f"the synthetic profile sizes to run, from {', '.join(SIZES)}",
+    )
+    group.addoption(
+        "--bench-baseline",
+        type=Path,
+        default=None,
+        help="fail benchmarks much slower than in this earlier results.json",
+    )
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=0.25,
+        help="the fraction a best time may exceed its baseline by",
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """Parametrize ``events`` by the requested sizes."""
+    if "events" in metafunc.fixturenames:
+        sizes = metafunc.config.getoption("--bench-sizes").split(",")
+        metafunc.parametrize("events", sizes, indirect=True, scope="session")
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    """Show, and write, the results of any benchmarks."""
+    if not RESULTS:
+        return
+    REPORT.parent.mkdir(parents=True, exist_ok=True)
+    REPORT.write_text(json.dumps(RESULTS, indent=2), **UTF8)
+    terminalreporter.section("benchmarks")
+    width = max(len(r["name"]) for r in RESULTS)
+    for result in RESULTS:
+        terminalreporter.write_line(
+            f"{result['name']:<{width}} {result['rounds']:>3} rounds "
+            f"{result['best'] * 1e3:>10.2f} ms best "
+            f"{result['peak_bytes'] / 1e6:>9.2f} MB peak"
+        )
+    terminalreporter.write_line(f"written to {REPORT}")
+
+
+@pytest.fixture(scope="session")
+def events(request: pytest.FixtureRequest) -> str:
+    """Provide the id of a synthetic profile size."""
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def a_synthetic_profile(events: str) -> str:
+    """Provide a synthetic speedscope profile, as JSON.
+
+    Frames are in files below the site packages and home folders, so the default
+    ``json_rewrites`` have work to do.
+    """
+    prefixes = [f"{site.getsitepackages()[0]}/", f"{Path.home()}/"]
+    return json.dumps(synthetic_profile(N_FRAMES, SIZES[events], prefixes=prefixes))
+
+
+class Bench:
+    """Time a function over rounds, then measure its peak memory."""
+
+    def __init__(self, request: pytest.FixtureRequest) -> None:
+        """Prepare to benchmark a test."""
+        self.request = request
+        self.result: dict[str, Any] | None = None
+
+    def __call__(
+        self,
+        fn: Callable[[], Any],
+        setup: Callable[[], Any] | None = None,
+        **extra: Any,
+    ) -> Any:
+        """Benchmark ``fn``, after an untimed ``setup`` before each round."""
+        times: list[float] = []
+        started = time.perf_counter()
+        while len(times) < MAX_ROUNDS and (
+            not times or time.perf_counter() - started < MIN_TIME
+        ):
+            times += [self._time(fn, setup)]
+
+        if setup is not None:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            value = fn()
+            peak = tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+
+        self.result = {
+            "name": self.request.node.nodeid,
+            "rounds": len(times),
+            "best": min(times),
+            "median": statistics.median(times),
+            "peak_bytes": peak,
+            **extra,
+        }
+        RESULTS.append(self.result)
+        self._check_baseline()
+        return value
+
+    @staticmethod
+    def _time(fn: Callable[[], Any], setup: Callable[[], Any] | None) -> float:
+        """Time one round of ``fn``, with the garbage collector disabled."""
+        if setup is not None:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            fn()
+            return time.perf_counter() - started
+        finally:
+            gc.enable()
+
+    def _check_baseline(self) -> None:
+        """Fail if the best time is much slower than in the baseline."""
+        config = self.request.config
+        path: Path | None = config.getoption("--bench-baseline")
+        if path is None or self.result is None:
+            return
+        baseline = {r["name"]: r for r in json.loads(path.read_text(**UTF8))}
+        old = baseline.get(self.result["name"])
+        if old is None:
+            return
+        limit = old["best"] * (1 + config.getoption("--bench-tolerance"))
+        best = self.result["best"]
+        assert best <= limit, f"{best:.4g}s is slower than the limit of {limit:.4g}s"
+
+
+@pytest.fixture
+def bench(request: pytest.FixtureRequest) -> Bench:
+    """Provide a benchmark runner, which fails if slower than any baseline."""
+    return Bench(request)
@@ -0,0 +1,42 @@
+"""Benchmarks of ``Callgraph``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, NoReturn
+
+import pytest
+
+from tests.conftest import synthetic_profile
+
+if TYPE_CHECKING:
+    from .conftest import Bench
+
+
+@pytest.mark.parametrize("max_nodes", [200, -1])
+def test_bench_mermaid(
+    a_synthetic_profile: str, max_nodes: int, bench: Bench
+) -> NoReturn:
+    """Benchmark rendering mermaid from an already-built callgraph."""
+    from ipyprofiler import Callgraph, ProfileJSON
+
+    cg = Callgraph(profile=ProfileJSON(value=a_synthetic_profile), max_nodes=max_nodes)
+    cg.profile.to_callgraph(max_nodes=max_nodes)
+    mermaid = bench(cg._mermaid)
+    assert mermaid.count("-->") > 1
+
+
+def test_bench_mermaid_10k_nodes(bench: Bench) -> NoReturn:
+    """Benchmark rendering 10,000 nodes and edges, with times and file groups."""
+    from ipyprofiler import Callgraph, ProfileJSON
+
+    cg = Callgraph(
+        profile=ProfileJSON(value=json.dumps(synthetic_profile(10_001, sampled=True))),
+        show_time=True,
+        group_by_file=True,
+    )
+    graph = cg.profile.to_callgraph()
+    assert len(graph["nodes"]) == 10_001
+    assert len(graph["edges"]) == 10_000
+    mermaid = bench(cg._mermaid)
+    assert mermaid.count("-->") == 20_000
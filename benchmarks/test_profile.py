@@ -0,0 +1,35 @@
+"""Benchmarks of ``ProfileJSON``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NoReturn
+
+if TYPE_CHECKING:
+    from .conftest import Bench
+
+
+def test_bench_to_callgraph(a_synthetic_profile: str, bench: Bench) -> NoReturn:
+    """Benchmark building a pruned callgraph from a fresh profile."""
+    from ipyprofiler import ProfileJSON
+
+    state: dict[str, Any] = {}
+
+    def setup() -> None:
+        state["profile"] = ProfileJSON(value=a_synthetic_profile)
+
+    graph = bench(lambda: state["profile"].to_callgraph(max_nodes=200), setup)
+    assert graph["nodes"]
+
+
+def test_bench_rewrite_speedscope_json(
+    a_synthetic_profile: str, bench: Bench
+) -> NoReturn:
+    """Benchmark rewriting the paths and name of a profile."""
+    from ipyprofiler import ProfileJSON
+
+    profile = ProfileJSON()
+    new_json = bench(
+        lambda: profile.rewrite_speedscope_json(a_synthetic_profile, name="renamed"),
+        size=len(a_synthetic_profile),
+    )
+    assert '"name": "renamed"' in new_json
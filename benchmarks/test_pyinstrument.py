@@ -0,0 +1,66 @@
+"""Benchmarks of ``Pyinstrument`` post-processing."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NoReturn
+
+import pytest
+
+from tests.conftest import fib
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .conftest import Bench
+
+
+def test_bench_post_process(a_synthetic_profile: str, bench: Bench) -> NoReturn:
+    """Benchmark rewriting and publishing a rendered profile."""
+    from ipyprofiler import Pyinstrument
+
+    class Synthetic(Pyinstrument):
+        def _speedscope_json(self, _profiler: Any) -> str:
+            return a_synthetic_profile
+
+    ps = Synthetic()
+
+    def setup() -> None:
+        ps._profile.value = "{}"
+
+    bench(lambda: ps._post_process(None, "synthetic", None), setup)
+    assert ps._profile.value != "{}"
+
+
+def test_bench_on_profiling(bench: Bench) -> NoReturn:
+    """Benchmark stopping, rendering and publishing a real profile."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(interval=0.0001)
+
+    def setup() -> None:
+        ps.profiling = True
+        fib(20)
+
+    def stop() -> None:
+        ps.profiling = False
+
+    bench(stop, setup)
+    assert "fib" in ps._profile.value
+
+
+@pytest.mark.parametrize("codec", ["json", "gzip", "zstd"])
+def test_bench_archive(
+    a_synthetic_profile: str, codec: str, tmp_path: Path, bench: Bench
+) -> NoReturn:
+    """Benchmark writing a profile and its manifest entry."""
+    from ipyprofiler import Pyinstrument
+    from ipyprofiler.constants import ArchiveCodec
+
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+
+    ps = Pyinstrument(output_folder=tmp_path, archive_codec=ArchiveCodec(codec))
+    bench(lambda: ps.archive(a_synthetic_profile, name="synthetic"))
+    size = sum(item.size for item in ps._history) / len(ps._history)
+    bench.result["size"] = size
+    assert ps._history
@@ -2,6 +2,26 @@ import { NAME, STYLE, VERSION, WIDGET_DEFAULTS } from '../tokens';
 
 import { DOMWidgetModel, DOMWidgetView } from '@jupyter-widgets/base';
 
+/** a profile `value`, as synced from the kernel */
+export type TProfileValue =
+  | string
+  | null
+  | { compression: CompressionFormat; buffer: DataView };
+
+/** decompress a binary `value`, if needed */
+export async function deserializeValue(
+  value: TProfileValue,
+): Promise<string | null> {
+  if (value == null || typeof value === 'string') {
+    return value;
+  }
+  const { compression, buffer } = value;
+  const stream = new Blob([buffer])
+    .stream()
+    .pipeThrough(new DecompressionStream(compression));
+  return await new Response(stream).text();
+}
+
 export class ProfileJSONModel extends DOMWidgetModel {
   static model_name = 'ProfileJSONModel';
   static model_module = NAME;
@@ -9,6 +29,10 @@ export class ProfileJSONModel extends DOMWidgetModel {
   static view_name = 'ProfileJSONView';
   static view_module = NAME;
   static view_module_version = VERSION;
+  static serializers = {
+    ...DOMWidgetModel.serializers,
+    value: { deserialize: deserializeValue },
+  };
 
   defaults() {
     return {
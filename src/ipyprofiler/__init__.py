@@ -6,21 +6,32 @@ from typing import TYPE_CHECKING, Any, Dict, List
 
 from .constants import __ext__, __ns__, __prefix__, __version__
 from .widget_callgraph import Callgraph
+from .widget_cprofile import CProfile
 from .widget_flamegraph import Flamegraph
 from .widget_profile import ProfileJSON
 from .widget_pyinstrument import Pyinstrument
+from .widget_sampler import AllThreads
+from .widget_summary import Summary
+from .widget_tracemalloc import Tracemalloc
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from IPython.core.interactiveshell import InteractiveShell
+
 __all__ = [
     "_jupyter_labextension_paths",
+    "load_ipython_extension",
     "__version__",
     "__js__",
+    "AllThreads",
     "Flamegraph",
     "Pyinstrument",
     "Callgraph",
+    "CProfile",
     "ProfileJSON",
+    "Summary",
+    "Tracemalloc",
 ]
 
 
@@ -30,3 +41,10 @@ def _jupyter_labextension_paths(
 ) -> List[Dict[str, Any]]:
     """Provide the mapping of labextensions at rest to their canonical location."""
     return [{"src": str(prefix / e), "dest": f"{__ns__}/{e}"} for e in extensions]
+
+
+def load_ipython_extension(shell: InteractiveShell) -> None:
+    """Register the ``%%ipyprofile`` magic with ``%load_ext ipyprofiler``."""
+    from .magics import load_ipython_extension as _load_ipython_extension
+
+    _load_ipython_extension(shell)
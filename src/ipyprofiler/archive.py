@@ -0,0 +1,146 @@
+"""Read and write (compressed) speedscope files."""
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import io
+import json
+from contextlib import contextmanager
+from functools import partial
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List
+
+from .callgraph import aggregate_profile
+from .constants import UTF8, ArchiveCodec
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+#: the name of the index of archived profiles in an ``output_folder``
+MANIFEST_NAME = "manifest.jsonl"
+
+#: the most (decompressed) bytes of a profile read, and decoded, at once
+READ_CHUNK_BYTES = 1024 * 1024
+
+#: file suffixes added for each codec
+ARCHIVE_SUFFIXES: Dict[ArchiveCodec, str] = {
+    ArchiveCodec.json: "",
+    ArchiveCodec.gzip: ".gz",
+    ArchiveCodec.zstd: ".zst",
+}
+
+
+def codec_for_path(path: Path) -> ArchiveCodec:
+    """Guess the codec of a file from its suffix."""
+    for codec, suffix in ARCHIVE_SUFFIXES.items():
+        if suffix and path.name.endswith(suffix):
+            return codec
+    return ArchiveCodec.json
+
+
+def with_codec_suffix(filename: str, codec: ArchiveCodec) -> str:
+    """Add the suffix for a codec to a filename, if missing."""
+    suffix = ARCHIVE_SUFFIXES[codec]
+    return filename if filename.endswith(suffix) else f"{filename}{suffix}"
+
+
+def write_profile(
+    path: Path, text: str, codec: ArchiveCodec = ArchiveCodec.json, level: int = 3
+) -> None:
+    """Write profile JSON to a file, compressing it as it is written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if codec == ArchiveCodec.json:
+        path.write_text(text, **UTF8)
+    elif codec == ArchiveCodec.gzip:
+        with gzip.open(path, "wt", compresslevel=level, **UTF8) as fd:
+            fd.write(text)
+    else:
+        zstandard = _zstandard()
+        with path.open("wb") as raw:
+            writer = zstandard.ZstdCompressor(level=level).stream_writer(raw)
+            with io.TextIOWrapper(writer, **UTF8) as fd:
+                fd.write(text)
+
+
+def read_profile(path: Path) -> str:
+    """Read profile JSON from a file, decompressing and decoding it in chunks.
+
+    Only the decoded chunks, then the joined text, are held in memory, never the
+    whole file as bytes.
+    """
+    with _open_profile(path) as fd:
+        chunks = iter(partial(fd.read, READ_CHUNK_BYTES), b"")
+        return "".join(codecs.iterdecode(chunks, UTF8["encoding"]))
+
+
+@contextmanager
+def _open_profile(path: Path) -> Generator[BinaryIO, None, None]:
+    """Open a profile file for reading decompressed bytes."""
+    codec = codec_for_path(path)
+    if codec == ArchiveCodec.json:
+        with path.open("rb") as fd:
+            yield fd
+    elif codec == ArchiveCodec.gzip:
+        with gzip.open(path, "rb") as fd:
+            yield fd
+    else:
+        zstandard = _zstandard()
+        decompressor = zstandard.ZstdDecompressor()
+        with path.open("rb") as raw, decompressor.stream_reader(raw) as fd:
+            yield fd
+
+
+def summarize_profile(doc: Dict[str, Any], top: int = 5) -> Dict[str, Any]:
+    """Describe a parsed speedscope document for a manifest."""
+    node_stats: Dict[int, List[float]] = {}
+    duration = 0.0
+    samples = 0
+    for profile in doc.get("profiles", []):
+        aggregate_profile(profile, node_stats=node_stats)
+        span = profile.get("endValue", 0) - profile.get("startValue", 0)
+        duration = max(duration, span)
+        if profile.get("type") == "sampled":
+            samples += len(profile["samples"])
+        else:
+            samples += sum(e["type"] == "O" for e in profile["events"])
+
+    frames = doc.get("shared", {}).get("frames", [])
+    hottest = sorted(node_stats.items(), key=lambda item: -item[1][1])[:top]
+    return {
+        "duration": duration,
+        "samples": samples,
+        "top_functions": [frames[i].get("name", "???") for i, _ in hottest],
+    }
+
+
+def append_manifest(folder: Path, record: Dict[str, Any]) -> None:
+    """Append a record to the manifest of an archive folder."""
+    with (folder / MANIFEST_NAME).open("a", **UTF8) as fd:
+        fd.write(json.dumps(record) + "\n")
+
+
+def replace_manifest(folder: Path, record: Dict[str, Any]) -> None:
+    """Replace any records for the same ``path`` in a manifest with ``record``."""
+    records = [r for r in read_manifest(folder) if r.get("path") != record["path"]]
+    lines = [json.dumps(r) + "\n" for r in [*records, record]]
+    (folder / MANIFEST_NAME).write_text("".join(lines), **UTF8)
+
+
+def read_manifest(folder: Path) -> List[Dict[str, Any]]:
+    """Read all the records from the manifest of an archive folder."""
+    path = folder / MANIFEST_NAME
+    if not path.exists():
+        return []
+    with path.open(**UTF8) as fd:
+        return [json.loads(line) for line in fd if line.strip()]
+
+
+def _zstandard() -> Any:
+    """Import the optional ``zstandard`` package."""
+    try:
+        import zstandard
+    except ImportError as err:
+        msg = "zstd archives require `zstandard`: pip install ipyprofiler[zstd]"
+        raise ImportError(msg) from err
+    return zstandard
@@ -0,0 +1,104 @@
+"""Summarize the timings of repeated runs."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from statistics import fmean, median, stdev
+from typing import Any, Dict, List, Sequence
+
+from .merge import percentile
+
+
+@dataclass
+class BenchmarkResult:
+    """The wall times of repeated runs, like ``timeit``, in seconds.
+
+    The statistics are of the unprofiled ``times``. The times of any profiled runs,
+    which include the profiler's overhead, are kept apart in ``profiled_times``.
+    """
+
+    name: str
+    times: List[float] = field(default_factory=list)
+    warmup: int = 0
+    profiled_times: List[float] = field(default_factory=list)
+
+    @property
+    def profiled(self) -> int:
+        """Get the number of profiled runs."""
+        return len(self.profiled_times)
+
+    @property
+    def profiled_mean(self) -> float:
+        """Get the mean time of a profiled run, or ``0`` if there were none."""
+        return fmean(self.profiled_times) if self.profiled_times else 0.0
+
+    @property
+    def mean(self) -> float:
+        """Get the mean time of a run."""
+        return fmean(self.times)
+
+    @property
+    def stdev(self) -> float:
+        """Get the standard deviation of the times, or ``0`` for a single run."""
+        return stdev(self.times) if len(self.times) > 1 else 0.0
+
+    @property
+    def median(self) -> float:
+        """Get the median time of a run."""
+        return median(self.times)
+
+    @property
+    def best(self) -> float:
+        """Get the fastest time of a run."""
+        return min(self.times)
+
+    @property
+    def p95(self) -> float:
+        """Get the 95th percentile time of a run."""
+        return percentile(self.times, 95)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the times, e.g. for a speedscope document."""
+        return {
+            "times": self.times,
+            "warmup": self.warmup,
+            "profiled": self.profiled,
+            "profiled_times": self.profiled_times,
+            "profiled_mean": self.profiled_mean,
+            **{key: getattr(self, key) for key in STATS},
+        }
+
+    def __str__(self) -> str:
+        """Format the times like ``timeit``."""
+        text = (
+            f"{format_time(self.mean)} ± {format_time(self.stdev)} per loop "
+            f"(mean ± std. dev. of {len(self.times)} runs, {self.warmup} warmup)"
+        )
+        if self.profiled:
+            text += (
+                f", {format_time(self.profiled_mean)} per profiled loop "
+                f"(mean of {self.profiled} runs)"
+            )
+        return text
+
+
+#: the summary statistics of a ``BenchmarkResult``
+STATS = ["mean", "stdev", "median", "best", "p95"]
+
+
+def describe_times(times: Sequence[float]) -> str:
+    """Summarize run times by their minimum, median and maximum, if any."""
+    if not times:
+        return ""
+    return (
+        f"min {format_time(min(times))}, median {format_time(median(times))}, "
+        f"max {format_time(max(times))} of {len(times)} runs"
+    )
+
+
+def format_time(seconds: float) -> str:
+    """Format a time with a sensible unit, like ``timeit``."""
+    for unit, scale in [("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
@@ -0,0 +1,98 @@
+"""Measure the overhead, and profile size, of sampling at different intervals."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Sequence
+
+#: the sampling intervals tried by default, in seconds
+DEFAULT_INTERVALS = (0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01)
+
+
+@dataclass
+class IntervalCalibration:
+    """The cost of profiling a workload at one sampling interval.
+
+    ``seconds`` and ``baseline`` are the best times of a profiled and unprofiled
+    run, and ``size`` is the length of the rendered profile.
+    """
+
+    interval: float
+    seconds: float
+    baseline: float
+    size: int
+
+    @property
+    def overhead(self) -> float:
+        """Get the extra time of a profiled run, as a fraction of the baseline."""
+        if self.baseline <= 0:
+            return 0.0
+        return max(self.seconds / self.baseline - 1.0, 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the calibration, with its ``overhead``."""
+        return {**asdict(self), "overhead": self.overhead}
+
+
+def measure_intervals(  # noqa: PLR0913
+    fn: Callable[[], Any],
+    start: Callable[[float], Any],
+    stop: Callable[[Any], None],
+    render: Callable[[Any], str],
+    *,
+    intervals: Sequence[float] = DEFAULT_INTERVALS,
+    repeat: int = 3,
+) -> List[IntervalCalibration]:
+    """Time ``fn`` unprofiled, then profiled at each interval, ``repeat`` times.
+
+    ``start`` returns a running profiler for an interval, which is given to ``stop``
+    after each run, and to ``render`` after the last, to measure its size. The
+    best time of each is kept, as the least disturbed by the rest of the machine.
+    ``fn`` is run once first, as a warmup.
+    """
+    fn()
+    baseline = min(_time(fn) for _ in range(repeat))
+    results = []
+    for interval in sorted(intervals):
+        best = float("inf")
+        for _ in range(repeat):
+            profiler = start(interval)
+            try:
+                best = min(best, _time(fn))
+            finally:
+                stop(profiler)
+        results.append(
+            IntervalCalibration(
+                interval=interval,
+                seconds=best,
+                baseline=baseline,
+                size=len(render(profiler)),
+            )
+        )
+    return results
+
+
+def choose_interval(
+    calibrations: Sequence[IntervalCalibration],
+    max_overhead: float = 0.02,
+    max_size: int = 0,
+) -> float:
+    """Choose the smallest interval within ``max_overhead`` and ``max_size``.
+
+    A ``max_size`` of ``0`` means no limit. If no interval fits, the largest is
+    chosen, as the least costly.
+    """
+    ordered = sorted(calibrations, key=lambda c: c.interval)
+    for calibration in ordered:
+        small_enough = max_size <= 0 or calibration.size <= max_size
+        if calibration.overhead <= max_overhead and small_enough:
+            return calibration.interval
+    return ordered[-1].interval
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    """Time one run of ``fn``."""
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
@@ -0,0 +1,378 @@
+"""Build aggregated call graphs from speedscope documents."""
+
+from __future__ import annotations
+
+from collections import Counter
+from itertools import repeat
+from typing import Any, Dict, List, Tuple
+
+from .constants import EXTRAS_KEY
+
+#: a ``(caller, callee)`` pair of frame indices
+EdgeKey = Tuple[int, int]
+#: per-edge ``[calls, time, self_time]``
+EdgeStats = Dict[EdgeKey, List[float]]
+#: per-frame ``[time, self_time]``
+NodeStats = Dict[int, List[float]]
+
+#: a ``profile_index`` which merges all profiles in a document
+ALL_PROFILES = -1
+
+
+def build_callgraph(doc: Dict[str, Any], profile_index: int = 0) -> Dict[str, Any]:
+    """Build a callgraph from a parsed speedscope document.
+
+    Edges are merged by ``(caller, callee)``, with call count, total and self time.
+    A ``profile_index`` of ``ALL_PROFILES`` merges every profile in the document.
+    """
+    edge_stats: EdgeStats = {}
+    node_stats: NodeStats = {}
+    profiles = select_profiles(doc, profile_index)
+
+    for profile in profiles:
+        aggregate_profile(profile, edge_stats, node_stats)
+
+    frames = doc["shared"]["frames"] if profiles else []
+    return to_graph(frames, edge_stats, node_stats)
+
+
+def summarize_frames(
+    doc: Dict[str, Any], profile_index: int = 0
+) -> List[Dict[str, Any]]:
+    """Build one row per frame, with total and self time, calls and share of time.
+
+    ``fraction`` is the share of all self time in the profile(s), i.e. of the run.
+    Exact ``ipyprofiler.call_counts``, e.g. from ``cProfile``, are preferred
+    to counting events or samples. Rows are in order of first appearance.
+    """
+    node_stats: NodeStats = {}
+    calls: Counter[int] = Counter()
+    profiles = select_profiles(doc, profile_index)
+    exact_calls = doc.get(EXTRAS_KEY, {}).get("call_counts")
+    if exact_calls is not None:
+        calls.update(dict(enumerate(exact_calls)))
+
+    for profile in profiles:
+        aggregate_profile(profile, node_stats=node_stats)
+        if exact_calls is None:
+            count_calls(profile, calls)
+
+    frames = doc["shared"]["frames"] if profiles else []
+    total = sum(self_time for _, self_time in node_stats.values()) or 1
+    return [
+        {
+            "frame": i,
+            "name": frames[i].get("name", ""),
+            "file": frames[i].get("file"),
+            "line": frames[i].get("line"),
+            "time": time,
+            "self_time": self_time,
+            "calls": calls[i],
+            "fraction": time / total,
+        }
+        for i, (time, self_time) in node_stats.items()
+    ]
+
+
+def select_profiles(
+    doc: Dict[str, Any], profile_index: int = 0
+) -> List[Dict[str, Any]]:
+    """Get one profile of a document, all profiles, or none if out of range."""
+    profiles = doc.get("profiles", [])
+    if profile_index == ALL_PROFILES:
+        return profiles
+    in_range = 0 <= profile_index < len(profiles)
+    return [profiles[profile_index]] if in_range else []
+
+
+def count_calls(
+    profile: Dict[str, Any], calls: Counter[int] | None = None
+) -> Counter[int]:
+    """Count the calls of each frame: ``O`` events, or samples which include it."""
+    calls = Counter() if calls is None else calls
+    if profile.get("type") == "sampled":
+        stack_counts = Counter(map(tuple, profile["samples"]))
+        for stack, count in stack_counts.items():
+            for frame in dict.fromkeys(stack):
+                calls[frame] += count
+    else:
+        calls.update(e["frame"] for e in profile["events"] if e["type"] == "O")
+    return calls
+
+
+def aggregate_profile(
+    profile: Dict[str, Any],
+    edge_stats: EdgeStats | None = None,
+    node_stats: NodeStats | None = None,
+) -> tuple[EdgeStats, NodeStats]:
+    """Aggregate an ``evented`` or ``sampled`` profile."""
+    if profile.get("type") == "sampled":
+        return aggregate_sampled(
+            profile["samples"], profile.get("weights"), edge_stats, node_stats
+        )
+    return aggregate_evented(profile["events"], edge_stats, node_stats)
+
+
+def aggregate_sampled(
+    samples: List[List[int]],
+    weights: List[float] | None = None,
+    edge_stats: EdgeStats | None = None,
+    node_stats: NodeStats | None = None,
+) -> tuple[EdgeStats, NodeStats]:
+    """Aggregate root-to-leaf stack ``samples``, weighted by ``weights``.
+
+    Weights are first summed per distinct stack, so the per-frame work scales with
+    the number of distinct stacks, not samples. Edge ``calls`` count samples.
+    """
+    edge_stats = {} if edge_stats is None else edge_stats
+    node_stats = {} if node_stats is None else node_stats
+    stack_weights: Dict[Tuple[int, ...], List[float]] = {}
+
+    for stack, weight in zip(samples, repeat(1) if weights is None else weights):
+        key = tuple(stack)
+        totals = stack_weights.get(key)
+        if totals is None:
+            stack_weights[key] = [1, weight]
+        else:
+            totals[0] += 1
+            totals[1] += weight
+
+    for stack, (count, weight) in stack_weights.items():
+        if not stack:
+            continue
+        for frame in dict.fromkeys(stack):
+            node = node_stats.get(frame)
+            if node is None:
+                node = node_stats[frame] = [0.0, 0.0]
+            node[0] += weight
+        node_stats[stack[-1]][1] += weight
+        for key in dict.fromkeys(zip(stack, stack[1:])):
+            edge = edge_stats.get(key)
+            if edge is None:
+                edge = edge_stats[key] = [0, 0.0, 0.0]
+            edge[0] += count
+            edge[1] += weight
+        if len(stack) > 1:
+            edge_stats[stack[-2], stack[-1]][2] += weight
+
+    return edge_stats, node_stats
+
+
+def aggregate_evented(
+    events: List[Dict[str, Any]],
+    edge_stats: EdgeStats | None = None,
+    node_stats: NodeStats | None = None,
+) -> tuple[EdgeStats, NodeStats]:
+    """Aggregate ``O``/``C`` events in a single pass.
+
+    Returns ``[calls, time, self_time]`` per edge and ``[time, self_time]`` per
+    frame, in order of first appearance. Time in recursive frames is only counted
+    once per frame.
+    """
+    edge_stats = {} if edge_stats is None else edge_stats
+    node_stats = {} if node_stats is None else node_stats
+    active: Dict[int, int] = {}
+    # open ``[frame, at, child_time]``
+    stack: List[List[Any]] = []
+    push = stack.append
+    pop = stack.pop
+
+    for event in events:
+        frame = event["frame"]
+        if event["type"] == "O":
+            if stack:
+                key = (stack[-1][0], frame)
+                if key not in edge_stats:
+                    edge_stats[key] = [0, 0.0, 0.0]
+            depth = active.get(frame)
+            if depth is None:
+                if frame not in node_stats:
+                    node_stats[frame] = [0.0, 0.0]
+                depth = 0
+            active[frame] = depth + 1
+            push([frame, event["at"], 0.0])
+        elif stack:
+            frame, opened, child_time = pop()
+            elapsed = event["at"] - opened
+            self_time = elapsed - child_time
+            node = node_stats[frame]
+            node[1] += self_time
+            depth = active[frame] - 1
+            active[frame] = depth
+            if not depth:
+                node[0] += elapsed
+            if stack:
+                parent = stack[-1]
+                parent[2] += elapsed
+                edge = edge_stats[parent[0], frame]
+                edge[0] += 1
+                edge[1] += elapsed
+                edge[2] += self_time
+
+    return edge_stats, node_stats
+
+
+def to_graph(
+    frames: List[Dict[str, Any]],
+    edge_stats: EdgeStats,
+    node_stats: NodeStats,
+) -> Dict[str, Any]:
+    """Format aggregated statistics as template-ready nodes, edges and groups."""
+    nodes = []
+    groups: Dict[str, Dict[str, Any]] = {}
+    for i, (time, self_time) in node_stats.items():
+        frame = frames[i]
+        node_id = f"n-{i}"
+        nodes += [{"id": node_id, **frame, "time": time, "self_time": self_time}]
+        frame_file = frame.get("file")
+        if frame_file is not None:
+            if frame_file not in groups:
+                groups[frame_file] = {
+                    "id": f"g-{len(groups)}",
+                    "file": frame_file,
+                    "nodes": [],
+                }
+            groups[frame_file]["nodes"].append(node_id)
+
+    edges = [
+        {
+            "id": f"e-{i}",
+            "source": f"n-{source}",
+            "target": f"n-{target}",
+            "calls": int(calls),
+            "time": time,
+            "self_time": self_time,
+        }
+        for i, ((source, target), (calls, time, self_time)) in enumerate(
+            edge_stats.items()
+        )
+    ]
+    return {"nodes": nodes, "edges": edges, "groups": [*groups.values()]}
+
+
+def prune_callgraph(
+    graph: Dict[str, Any],
+    max_nodes: int = -1,
+    min_time_fraction: float = 0.0,
+    max_depth: int = -1,
+) -> Dict[str, Any]:
+    """Keep the hottest nodes of a callgraph, folding the rest into ``other`` nodes.
+
+    Nodes are ranked by total time. Time spent in dropped callees of a kept caller
+    is shown as a single ``(other)`` node below that caller. Negative limits are
+    ignored.
+    """
+    nodes = graph["nodes"]
+    if max_nodes < 0 and min_time_fraction <= 0 and max_depth < 0:
+        return graph
+
+    selected = _select_nodes(nodes, graph["edges"], min_time_fraction, max_depth)
+    kept = {n["id"] for n in _cap_nodes(selected, max_nodes)}
+    edges, others = _fold_edges(graph["edges"], kept)
+
+    groups = []
+    for group in graph["groups"]:
+        group_nodes = [n for n in group["nodes"] if n in kept]
+        if group_nodes:
+            groups += [{**group, "nodes": group_nodes}]
+
+    return {
+        "nodes": [*(n for n in nodes if n["id"] in kept), *others],
+        "edges": edges,
+        "groups": groups,
+    }
+
+
+def _select_nodes(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    min_time_fraction: float = 0.0,
+    max_depth: int = -1,
+) -> List[Dict[str, Any]]:
+    """Get the nodes with at least ``min_time_fraction`` of the time, to a depth."""
+    depths = _node_depths(nodes, edges)
+    total = sum(n["time"] for n in nodes if depths[n["id"]] == 0)
+    min_time = total * min_time_fraction
+    return [
+        node
+        for node in nodes
+        if node["time"] >= min_time
+        and (max_depth < 0 or depths[node["id"]] <= max_depth)
+    ]
+
+
+def _cap_nodes(
+    nodes: List[Dict[str, Any]], max_nodes: int = -1
+) -> List[Dict[str, Any]]:
+    """Get at most ``max_nodes`` of the nodes with the most total time."""
+    ranked = sorted(nodes, key=lambda n: -n["time"])
+    return ranked if max_nodes < 0 else ranked[:max_nodes]
+
+
+def _fold_edges(
+    edges: List[Dict[str, Any]], kept: set[str]
+) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Keep edges between ``kept`` nodes, folding the rest into ``(other)`` nodes.
+
+    Returns the new edges, renumbered, and the new ``(other)`` nodes.
+    """
+    new_edges = []
+    others: Dict[str, Dict[str, Any]] = {}
+    for edge in edges:
+        source, target = edge["source"], edge["target"]
+        if source not in kept:
+            continue
+        if target in kept:
+            new_edges += [{**edge}]
+            continue
+        other = others.get(source)
+        if other is None:
+            other_id = f"{source}-other"
+            other = others[source] = {
+                "node": {"id": other_id, "name": "(other)", "time": 0, "self_time": 0},
+                "edge": {
+                    "id": None,
+                    "source": source,
+                    "target": other_id,
+                    "calls": 0,
+                    "time": 0,
+                    "self_time": 0,
+                },
+            }
+            new_edges += [other["edge"]]
+        for key in ["calls", "time"]:
+            other["edge"][key] += edge[key]
+        other["node"]["time"] += edge["time"]
+
+    for i, edge in enumerate(new_edges):
+        edge["id"] = f"e-{i}"
+
+    return new_edges, [other["node"] for other in others.values()]
+
+
+def _node_depths(
+    nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]
+) -> Dict[str, int]:
+    """Find the shortest call depth of each node from any root."""
+    children: Dict[str, List[str]] = {}
+    has_parent = set()
+    for edge in edges:
+        children.setdefault(edge["source"], []).append(edge["target"])
+        if edge["source"] != edge["target"]:
+            has_parent.add(edge["target"])
+
+    frontier = [n["id"] for n in nodes if n["id"] not in has_parent]
+    depths = dict.fromkeys(frontier, 0)
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for node_id in frontier:
+            for child in children.get(node_id, []):
+                if child not in depths:
+                    depths[child] = depth
+                    next_frontier.append(child)
+        frontier = next_frontier
+
+    # nodes only reachable through cycles
+    return {n["id"]: depths.get(n["id"], depth) for n in nodes}
@@ -16,6 +16,10 @@ FRAG = f"share/jupyter/labextensions/{__ns__}"
 IN_TREE = (HERE / "../_d").resolve() / FRAG
 IN_PREFIX = Path(sys.prefix) / FRAG
 UTF8 = {"encoding": "utf-8"}
+#: the ``interval`` of a profiler which uses its calibrated ``auto_interval``
+AUTO_INTERVAL = "auto"
+#: the key of ``ipyprofiler``'s own fields in a speedscope document
+EXTRAS_KEY = "ipyprofiler"
 
 __prefix__ = IN_TREE if IN_TREE.exists() else IN_PREFIX
 
@@ -28,6 +32,32 @@ class AsyncMode(Enum):
     strict = "strict"
 
 
+class Compression(Enum):
+    """Allowed codecs for syncing ``ProfileJSON.value`` as a binary buffer."""
+
+    none = "none"
+    gzip = "gzip"
+    deflate = "deflate"
+
+
+class ArchiveCodec(Enum):
+    """Allowed on-disk formats for archived profiles."""
+
+    json = "json"
+    gzip = "gzip"
+    zstd = "zstd"
+
+
+class SummaryColumn(Enum):
+    """Allowed columns for sorting a ``Summary``."""
+
+    self_time = "self_time"
+    time = "time"
+    calls = "calls"
+    name = "name"
+    file = "file"
+
+
 class MermaidDirection(Enum):
     """Allowed values for mermaid graph directions."""
 
@@ -43,6 +73,7 @@ class DOMClasses(Enum):
     pyinstrument = "jprf-Pyinstrument"
     callgraph = "jprf-Callgraph"
     callgraph_options = "jprf-Callgraph-Options"
+    summary = "jprf-Summary"
 
 
 SPEEDSCOPE_SIMPLE_JSON = """
@@ -0,0 +1,117 @@
+"""Convert ``cProfile``/``pstats`` statistics to speedscope documents."""
+
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, List, Tuple
+
+from .constants import EXTRAS_KEY
+from .diff import SPEEDSCOPE_SCHEMA
+
+#: a ``pstats`` function key, ``(file, line, name)``
+StatsKey = Tuple[str, int, str]
+#: ``pstats`` statistics: primitive calls, calls, self time, total time, and callers
+Stats = Dict[StatsKey, Tuple[Any, ...]]
+
+#: the ``file`` of built-in functions in ``pstats`` keys
+BUILTIN_FILE = "~"
+#: the smallest fraction of total time expanded into callees
+DEFAULT_MIN_TIME_FRACTION = 1e-4
+#: the most stacks to expand
+DEFAULT_MAX_STACKS = 100_000
+
+
+def pstats_to_document(
+    stats: Stats,
+    name: str = "cProfile",
+    min_time_fraction: float = DEFAULT_MIN_TIME_FRACTION,
+    max_stacks: int = DEFAULT_MAX_STACKS,
+) -> Dict[str, Any]:
+    """Build a sampled speedscope document from ``pstats`` statistics.
+
+    ``pstats`` only records ``(caller, callee)`` pairs, so stacks are rebuilt from
+    the roots down, splitting each function's time between its callees in
+    proportion to the time they spent under it. Recursive calls are not expanded.
+    The hottest stacks are expanded first, and stacks with less than
+    ``min_time_fraction`` of the total time, or beyond the first ``max_stacks``,
+    are kept whole, which bounds the output for very large tables. Exact per-frame
+    call counts are stored in ``ipyprofiler.call_counts``, aligned with
+    ``shared.frames``.
+    """
+    index = {key: i for i, key in enumerate(stats)}
+    frames = [
+        {"name": fn} if f == BUILTIN_FILE else {"name": fn, "file": f, "line": line}
+        for f, line, fn in stats
+    ]
+    call_counts = [entry[1] for entry in stats.values()]
+    self_times = [entry[2] for entry in stats.values()]
+    totals = [entry[3] for entry in stats.values()]
+
+    # per-caller ``[callee, time under caller]``
+    callees: List[List[Tuple[int, float]]] = [[] for _ in frames]
+    roots = []
+    for i, entry in enumerate(stats.values()):
+        callers = entry[4]
+        known = [(index[c], edge[3]) for c, edge in callers.items() if c in index]
+        for caller, time in known:
+            callees[caller].append((i, time))
+        if not known:
+            roots.append(i)
+
+    total = sum(totals[i] for i in roots) or sum(self_times)
+    min_time = total * min_time_fraction
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    # ``(-time, order, stack)``, expanding the hottest stacks first
+    todo = [(-totals[i], i, (i,)) for i in roots]
+    heapq.heapify(todo)
+    order = len(todo)
+    while todo:
+        neg_time, _, stack = heapq.heappop(todo)
+        time = -neg_time
+        if len(samples) >= max_stacks:
+            samples.append(list(stack))
+            weights.append(time)
+            continue
+        frame = stack[-1]
+        share = time / totals[frame] if totals[frame] else 0.0
+        self_time = min(self_times[frame] * share, time)
+        children = [
+            (callee, callee_time * share)
+            for callee, callee_time in callees[frame]
+            if callee_time > 0 and callee not in stack
+        ]
+        # don't hand out more time than this stack had, even for odd tables
+        child_total = sum(t for _, t in children)
+        scale = min(1.0, (time - self_time) / child_total) if child_total else 0.0
+        if time - child_total * scale > 0:
+            samples.append(list(stack))
+            weights.append(time - child_total * scale)
+        for callee, callee_time in children:
+            time_here = callee_time * scale
+            if time_here < min_time:
+                if time_here > 0:
+                    samples.append([*stack, callee])
+                    weights.append(time_here)
+            else:
+                order += 1
+                heapq.heappush(todo, (-time_here, order, (*stack, callee)))
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        EXTRAS_KEY: {"call_counts": call_counts},
+    }
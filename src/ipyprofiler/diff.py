@@ -0,0 +1,266 @@
+"""Compare speedscope profiles by aligned call stacks."""
+
+from __future__ import annotations
+
+import json
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Sequence, Tuple
+
+from .callgraph import ALL_PROFILES
+from .widget_profile import ProfileJSON
+
+if TYPE_CHECKING:
+    from .table import ProfileTable
+
+#: the fields which identify the same frame in different profiles
+FRAME_KEYS = ["name", "file", "line"]
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class StackTrie:
+    """Intern call stacks of aligned frames as integer ids."""
+
+    def __init__(self) -> None:
+        """Create an empty trie, with shared frames."""
+        self.frames: List[Dict[str, Any]] = []
+        self.frame_ids: Dict[Tuple[Any, ...], int] = {}
+        self.node_ids: Dict[Tuple[int, int], int] = {}
+        self.node_parents: List[int] = []
+        self.node_frames: List[int] = []
+
+    def intern_frames(self, frames: List[Dict[str, Any]]) -> List[int]:
+        """Map frames from a document to shared frame ids."""
+        frame_map = []
+        for frame in frames:
+            key = tuple(frame.get(k) for k in FRAME_KEYS)
+            frame_id = self.frame_ids.get(key)
+            if frame_id is None:
+                frame_id = self.frame_ids[key] = len(self.frames)
+                self.frames.append({k: v for k, v in frame.items() if k in FRAME_KEYS})
+            frame_map.append(frame_id)
+        return frame_map
+
+    def child(self, parent: int, frame: int) -> int:
+        """Get the id of a stack, from its parent stack id and leaf frame id."""
+        key = (parent, frame)
+        node = self.node_ids.get(key)
+        if node is None:
+            node = self.node_ids[key] = len(self.node_frames)
+            self.node_parents.append(parent)
+            self.node_frames.append(frame)
+        return node
+
+    def stacks(self) -> List[Tuple[int, ...]]:
+        """Get the root-to-leaf frame ids of every stack, indexed by stack id.
+
+        Parents are always interned before their children, so each stack extends an
+        already-built one.
+        """
+        stacks: List[Tuple[int, ...]] = []
+        root: Tuple[int, ...] = ()
+        for parent, frame in zip(self.node_parents, self.node_frames):
+            stacks.append((stacks[parent] if parent != -1 else root) + (frame,))
+        return stacks
+
+    def self_times(
+        self, doc: Dict[str, Any], profile_index: int = ALL_PROFILES
+    ) -> Dict[int, float]:
+        """Get the self time of each stack in a document."""
+        times: Dict[int, float] = {}
+        frame_map = self.intern_frames(doc.get("shared", {}).get("frames", []))
+        profiles = doc.get("profiles", [])
+        if profile_index != ALL_PROFILES:
+            profiles = profiles[profile_index : profile_index + 1]
+        for profile in profiles:
+            if profile.get("type") == "sampled":
+                self._add_sampled(profile, frame_map, times)
+            else:
+                self._add_evented(profile["events"], frame_map, times)
+        return times
+
+    def _add_evented(
+        self,
+        events: List[Dict[str, Any]],
+        frame_map: List[int],
+        times: Dict[int, float],
+    ) -> None:
+        """Attribute the time between events to the open stack."""
+        child = self.child
+        stack: List[int] = []
+        node = -1
+        last_at = 0.0
+        for event in events:
+            at = event["at"]
+            if node != -1:
+                times[node] = times.get(node, 0.0) + at - last_at
+            last_at = at
+            if event["type"] == "O":
+                stack.append(node)
+                node = child(node, frame_map[event["frame"]])
+            elif stack:
+                node = stack.pop()
+
+    def _add_sampled(
+        self,
+        profile: Dict[str, Any],
+        frame_map: List[int],
+        times: Dict[int, float],
+    ) -> None:
+        """Attribute sample weights to stacks, resolving each distinct stack once."""
+        samples = profile["samples"]
+        weights = profile.get("weights") or [1] * len(samples)
+        stack_weights: Dict[Tuple[int, ...], float] = {}
+        for stack, weight in zip(samples, weights):
+            key = tuple(stack)
+            stack_weights[key] = stack_weights.get(key, 0.0) + weight
+        for stack, weight in stack_weights.items():
+            node = -1
+            for frame in stack:
+                node = self.child(node, frame_map[frame])
+            if node != -1:
+                times[node] = times.get(node, 0.0) + weight
+
+
+def diff_documents(
+    before: Dict[str, Any],
+    after: Dict[str, Any],
+    name: str = "diff",
+    profile_index: int = ALL_PROFILES,
+) -> Dict[str, Any]:
+    """Build a speedscope document of the per-stack self time change.
+
+    The ``regressions`` profile is weighted by time gained, and ``improvements`` by
+    time lost, from ``before`` to ``after``.
+    """
+    return _diff(
+        (before, _tables(before, profile_index)),
+        (after, _tables(after, profile_index)),
+        name,
+        profile_index,
+    )
+
+
+def _diff(
+    before_tables: Tuple[Dict[str, Any], List[ProfileTable] | None],
+    after_tables: Tuple[Dict[str, Any], List[ProfileTable] | None],
+    name: str,
+    profile_index: int,
+) -> Dict[str, Any]:
+    """Diff documents from their tables if all have one, or by walking stacks."""
+    before, after = before_tables[0], after_tables[0]
+    trie = StackTrie()
+    diffed = _diff_tables(trie, before_tables, after_tables)
+    if diffed is None:
+        before_times = trie.self_times(before, profile_index)
+        after_times = trie.self_times(after, profile_index)
+        deltas = dict(after_times)
+        for node, time in before_times.items():
+            deltas[node] = deltas.get(node, 0.0) - time
+        stacks = trie.stacks()
+        diffed = [stacks[node] for node in deltas], [*deltas.values()]
+    samples, changes = diffed
+
+    unit = next(
+        (p.get("unit") for p in after.get("profiles", []) if "unit" in p), "none"
+    )
+    profiles = []
+    for profile_name, sign in [("regressions", 1), ("improvements", -1)]:
+        picked = [
+            (stack, sign * d) for stack, d in zip(samples, changes) if sign * d > 0
+        ]
+        total = sum(weight for _, weight in picked)
+        profiles += [
+            {
+                "type": "sampled",
+                "name": f"{name}: {profile_name}",
+                "unit": unit,
+                "startValue": 0,
+                "endValue": total,
+                "samples": [stack for stack, _ in picked],
+                "weights": [weight for _, weight in picked],
+            }
+        ]
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "shared": {"frames": trie.frames},
+        "profiles": profiles,
+    }
+
+
+def _diff_tables(
+    trie: StackTrie,
+    before_tables: Tuple[Dict[str, Any], List[ProfileTable] | None],
+    after_tables: Tuple[Dict[str, Any], List[ProfileTable] | None],
+) -> Tuple[List[Tuple[int, ...]], List[float]] | None:
+    """Get each changed stack and its self time change, from typed arrays.
+
+    Only possible with ``numpy``, when every selected profile is balanced and evented.
+    """
+    if before_tables[1] is None or after_tables[1] is None:
+        return None
+    runs = [
+        (table, frame_map)
+        for doc, tables in [before_tables, after_tables]
+        for frame_map in [trie.intern_frames(doc.get("shared", {}).get("frames", []))]
+        for table in tables or []
+    ]
+    if not runs:
+        return None
+
+    from .table import stack_paths, stack_times
+
+    parents, frames, times = stack_times(runs)
+    n_before = len(before_tables[1])
+    deltas = times[n_before:].sum(axis=0) - times[:n_before].sum(axis=0)
+    paths = stack_paths(parents, frames)
+    changed = deltas.nonzero()[0]
+    return [paths[i] for i in changed.tolist()], deltas[changed].tolist()
+
+
+def _tables(
+    doc: Dict[str, Any],
+    profile_index: int,
+    to_table: Callable[[int], ProfileTable] | None = None,
+) -> List[ProfileTable] | None:
+    """Get a table of each selected profile, unless any is unbalanced or sampled.
+
+    Tables come from ``to_table``, if given, e.g. to reuse those cached on a
+    ``ProfileJSON``.
+    """
+    try:
+        from .table import ProfileTable
+    except ImportError:
+        return None
+    to_table = to_table or partial(ProfileTable.from_document, doc)
+    indices: Sequence[int] = range(len(doc.get("profiles", [])))
+    if profile_index != ALL_PROFILES:
+        indices = indices[profile_index : profile_index + 1]
+    tables = []
+    for index in indices:
+        try:
+            table = to_table(index)
+        except ValueError:
+            return None
+        if not table.balanced:
+            return None
+        tables += [table]
+    return tables
+
+
+def diff_profiles(
+    before: ProfileJSON,
+    after: ProfileJSON,
+    profile_index: int = ALL_PROFILES,
+) -> ProfileJSON:
+    """Build a ``ProfileJSON`` of regressions and improvements between profiles."""
+    name = f"{before.name or 'before'} vs {after.name or 'after'}"
+    before_doc, after_doc = before.parsed(), after.parsed()
+    doc = _diff(
+        (before_doc, _tables(before_doc, profile_index, before.to_table)),
+        (after_doc, _tables(after_doc, profile_index, after.to_table)),
+        name,
+        profile_index,
+    )
+    return ProfileJSON(value=json.dumps(doc), name=name)
@@ -0,0 +1,74 @@
+"""IPython magics for profiling and benchmarking cells."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from IPython.core.magic import Magics, cell_magic, magics_class
+from IPython.core.magic_arguments import argument, magic_arguments, parse_argstring
+
+if TYPE_CHECKING:
+    from IPython.core.interactiveshell import InteractiveShell
+
+    from .benchmark import BenchmarkResult
+
+
+@magics_class
+class ProfilerMagics(Magics):
+    """Benchmark and profile cells with ``%%ipyprofile``."""
+
+    @magic_arguments()
+    @argument("-n", "--repeat", type=int, default=10, help="the timed runs")
+    @argument("-w", "--warmup", type=int, default=1, help="the untimed runs first")
+    @argument(
+        "-p",
+        "--profile-repeat",
+        type=int,
+        default=1,
+        help="the profiled runs after the timed runs, timed apart",
+    )
+    @argument("--name", default=None, help="the name of the merged profile")
+    @argument("-o", "--output", action="store_true", help="return the BenchmarkResult")
+    @argument(
+        "profiler",
+        nargs="?",
+        default=None,
+        help="the name of a Pyinstrument (or subclass) in the namespace",
+    )
+    @cell_magic
+    def ipyprofile(self, line: str, cell: str) -> BenchmarkResult | None:
+        """Run a cell with warmup and repeats, publishing the merged profile.
+
+        Without a ``profiler``, a new ``Pyinstrument`` is created and displayed.
+        """
+        from IPython.display import display
+
+        from .widget_pyinstrument import Pyinstrument
+
+        args = parse_argstring(self.ipyprofile, line)
+        shell = self.shell
+        if args.profiler is None:
+            profiler = Pyinstrument()
+            display(profiler.ui())
+        else:
+            profiler = shell.user_ns[args.profiler]
+
+        code = shell.compile(cell, "<ipyprofile>", "exec")
+
+        def run() -> None:
+            exec(code, shell.user_ns)  # noqa: S102
+
+        result = profiler.benchmark(
+            run,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            profile_repeat=args.profile_repeat,
+            name=args.name,
+        )
+        print(result)  # noqa: T201
+        return result if args.output else None
+
+
+def load_ipython_extension(shell: InteractiveShell) -> None:
+    """Register the magics with ``%load_ext ipyprofiler``."""
+    shell.register_magics(ProfilerMagics)
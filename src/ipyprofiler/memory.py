@@ -0,0 +1,121 @@
+"""Convert ``tracemalloc`` snapshots to speedscope documents."""
+
+from __future__ import annotations
+
+import linecache
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .constants import EXTRAS_KEY
+from .diff import SPEEDSCOPE_SCHEMA
+
+#: allocations made in files starting with these are never shown
+IGNORE_PREFIXES = (tracemalloc.__file__, str(Path(__file__).parent))
+
+
+class MemoryProfiler:
+    """Record allocations made between ``start`` and ``stop`` with ``tracemalloc``.
+
+    If ``tracemalloc`` is not already tracing, it is started, and no snapshot is
+    needed at ``start``, as every remaining trace was allocated since. Otherwise,
+    a snapshot at ``start`` is compared with one at ``stop``.
+    """
+
+    def __init__(self, nframes: int = 25) -> None:
+        """Create a profiler, keeping up to ``nframes`` of each traceback."""
+        self.nframes = nframes
+        self.is_running = False
+        self.peak = 0
+        self.before: tracemalloc.Snapshot | None = None
+        self.after: tracemalloc.Snapshot | None = None
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start tracing, or take a snapshot if already tracing."""
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.nframes)
+        else:
+            self.before = tracemalloc.take_snapshot()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self.is_running = True
+
+    def stop(self) -> None:
+        """Take a snapshot, and stop tracing if it was started here."""
+        self.after = tracemalloc.take_snapshot()
+        self.peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.is_running = False
+
+    def to_document(self, name: str = "tracemalloc") -> Dict[str, Any]:
+        """Build a speedscope document of the bytes allocated and not yet freed."""
+        if self.after is None:
+            stats: List[Any] = []
+        elif self.before is None:
+            stats = self.after.statistics("traceback")
+        else:
+            stats = self.after.compare_to(self.before, "traceback")
+        return statistics_to_document(stats, name=name, peak=self.peak)
+
+
+def statistics_to_document(
+    stats: List[Any], name: str = "tracemalloc", peak: int = 0
+) -> Dict[str, Any]:
+    """Build a sampled speedscope document, weighted by bytes, from traceback stats.
+
+    ``stats`` may be ``tracemalloc.Statistic`` or ``StatisticDiff``, grouped by
+    ``traceback``: only growth is shown. Frames are named by their line of source.
+    Allocations from ``IGNORE_PREFIXES`` are dropped after grouping, which is much
+    cheaper than filtering every trace in a large heap.
+    """
+    frames: List[Dict[str, Any]] = []
+    frame_ids: Dict[Tuple[str, int], int] = {}
+    samples: List[List[int]] = []
+    weights: List[int] = []
+
+    for stat in stats:
+        size = getattr(stat, "size_diff", stat.size)
+        if size <= 0 or stat.traceback[-1].filename.startswith(IGNORE_PREFIXES):
+            continue
+        stack = []
+        for frame in stat.traceback:
+            key = (frame.filename, frame.lineno)
+            frame_id = frame_ids.get(key)
+            if frame_id is None:
+                frame_id = frame_ids[key] = len(frames)
+                frames.append(_frame(*key))
+            stack.append(frame_id)
+        samples.append(stack)
+        weights.append(size)
+
+    total = sum(weights)
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "bytes",
+                "startValue": 0,
+                "endValue": total,
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        EXTRAS_KEY: {"peak_bytes": peak},
+    }
+
+
+def _frame(filename: str, lineno: int) -> Dict[str, Any]:
+    """Describe a traceback frame, named by its source, if available."""
+    source = linecache.getline(filename, lineno).strip()
+    return {
+        "name": source or f"{Path(filename).name}:{lineno}",
+        "file": filename,
+        "line": lineno,
+    }
@@ -0,0 +1,149 @@
+"""Merge repeated runs of a workload into one statistical profile."""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from statistics import fmean, median
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from .archive import read_profile
+from .callgraph import aggregate_profile
+from .constants import EXTRAS_KEY
+from .diff import SPEEDSCOPE_SCHEMA, StackTrie
+from .widget_profile import ProfileJSON
+
+#: a speedscope document, as a parsed ``dict``, JSON string or path to a file
+Source = Union[Dict[str, Any], str, Path]
+#: per-run frames, unit, per-frame ``[time, self_time]``, and per-stack self time
+RunSummary = Tuple[
+    List[Dict[str, Any]],
+    str,
+    Dict[int, List[float]],
+    List[Tuple[Tuple[int, ...], float]],
+]
+
+#: the fewest inputs worth starting a process pool for
+MIN_POOL_INPUTS = 8
+
+
+def summarize_run(source: Source) -> RunSummary:
+    """Aggregate one run, in terms of its own interned frame table."""
+    if isinstance(source, Path):
+        source = read_profile(source)
+    doc = json.loads(source) if isinstance(source, str) else source
+    frames = doc.get("shared", {}).get("frames", [])
+
+    node_stats: Dict[int, List[float]] = {}
+    unit = "none"
+    for profile in doc.get("profiles", []):
+        aggregate_profile(profile, node_stats=node_stats)
+        unit = profile.get("unit", unit)
+
+    trie = StackTrie()
+    frame_map = trie.intern_frames(frames)
+    frame_stats: Dict[int, List[float]] = {}
+    for frame, (time, self_time) in node_stats.items():
+        stats = frame_stats.setdefault(frame_map[frame], [0.0, 0.0])
+        stats[0] += time
+        stats[1] += self_time
+
+    times = trie.self_times(doc)
+    stacks = trie.stacks()
+    run_stacks = [(stacks[node], time) for node, time in times.items()]
+    return trie.frames, unit, frame_stats, run_stacks
+
+
+def merge_documents(
+    sources: Sequence[Source],
+    name: str = "merged",
+    processes: int | None = None,
+) -> Dict[str, Any]:
+    """Merge runs into a speedscope document of their mean per-stack self time.
+
+    Per-frame ``mean``, ``median`` and ``p95`` of total and self time across runs
+    are stored in ``ipyprofiler.frame_stats``, aligned with ``shared.frames``. With
+    at least ``MIN_POOL_INPUTS`` sources, runs are summarized in a process pool,
+    unless ``processes`` is ``1``.
+    """
+    if processes != 1 and len(sources) >= MIN_POOL_INPUTS:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            summaries = list(pool.map(summarize_run, sources))
+    else:
+        summaries = [summarize_run(source) for source in sources]
+
+    trie = StackTrie()
+    stack_times: Dict[Tuple[int, ...], float] = {}
+    frame_times: Dict[int, List[List[float]]] = {}
+    n_runs = len(summaries)
+    unit = summaries[0][1] if summaries else "none"
+
+    for run, (frames, _unit, node_stats, run_stacks) in enumerate(summaries):
+        frame_map = trie.intern_frames(frames)
+        for stack, time in run_stacks:
+            key = tuple(frame_map[frame] for frame in stack)
+            stack_times[key] = stack_times.get(key, 0.0) + time
+        for frame, (time, self_time) in node_stats.items():
+            frame_id = frame_map[frame]
+            times = frame_times.get(frame_id)
+            if times is None:
+                times = frame_times[frame_id] = [[0.0] * n_runs, [0.0] * n_runs]
+            times[0][run] += time
+            times[1][run] += self_time
+
+    weights = [time / n_runs for time in stack_times.values()]
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "shared": {"frames": trie.frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": f"{name}: mean of {n_runs} runs",
+                "unit": unit,
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": [list(stack) for stack in stack_times],
+                "weights": weights,
+            }
+        ],
+        EXTRAS_KEY: {
+            "frame_stats": [
+                _frame_stats(*frame_times.get(i, [[0.0], [0.0]]))
+                for i in range(len(trie.frames))
+            ],
+        },
+    }
+
+
+def merge_profiles(
+    sources: Sequence[ProfileJSON | Source],
+    name: str = "merged",
+    processes: int | None = None,
+) -> ProfileJSON:
+    """Merge repeated runs into one ``ProfileJSON``."""
+    docs = [s.value if isinstance(s, ProfileJSON) else s for s in sources]
+    doc = merge_documents(docs, name=name, processes=processes)
+    return ProfileJSON(value=json.dumps(doc), name=name)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linearly interpolate a percentile of some values."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _frame_stats(times: List[float], self_times: List[float]) -> Dict[str, Any]:
+    """Describe the distribution of a frame's times across runs."""
+    return {
+        key: {
+            "mean": fmean(values),
+            "median": median(values),
+            "p95": percentile(values, 95),
+        }
+        for key, values in [("time", times), ("self_time", self_times)]
+    }
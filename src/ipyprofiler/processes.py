@@ -0,0 +1,90 @@
+"""Profile worker processes, and combine their profiles with the parent's."""
+
+from __future__ import annotations
+
+import json
+import os
+from multiprocessing import util
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from .constants import UTF8
+from .diff import SPEEDSCOPE_SCHEMA, StackTrie
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+#: the file name pattern of worker profiles in a spool folder
+WORKER_GLOB = "worker-*.json"
+
+
+def profile_worker(spool: Path, interval: float = 0.001) -> None:
+    """Profile this worker process until it exits, writing to ``spool``.
+
+    Pass as the ``initializer`` of a ``ProcessPoolExecutor`` or
+    ``multiprocessing.Pool``. The profile is written when the worker exits normally,
+    e.g. on ``shutdown()`` or ``close()``, but not ``terminate()``. ``async_mode``
+    is disabled, as a forked worker inherits the parent's active profiler context.
+    """
+    from pyinstrument import Profiler
+
+    profiler = Profiler(interval=interval, async_mode="disabled")
+    profiler.start()
+    util.Finalize(None, _write_worker, args=(profiler, spool), exitpriority=10)
+
+
+def _write_worker(profiler: Any, spool: Path) -> None:
+    """Stop profiling, and write a speedscope profile of this worker."""
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    profiler.stop()
+    pid = os.getpid()
+    tmp_path = spool / f"worker-{pid}.json.tmp"
+    tmp_path.write_text(profiler.output(SpeedscopeRenderer()), **UTF8)
+    tmp_path.rename(spool / f"worker-{pid}.json")
+
+
+def read_spool(spool: Path) -> List[Tuple[str, Dict[str, Any]]]:
+    """Read the worker profiles in a spool folder, labelled by process id."""
+    return [
+        (f"worker {path.stem.split('-')[-1]}", json.loads(path.read_text(**UTF8)))
+        for path in sorted(spool.glob(WORKER_GLOB))
+    ]
+
+
+def combine_documents(
+    docs: List[Tuple[str, Dict[str, Any]]], name: str = "processes"
+) -> Dict[str, Any]:
+    """Combine labelled speedscope documents into one, with shared frames.
+
+    Frames are aligned by ``name``, ``file`` and ``line``, and each profile is
+    named with its document's label, and its own name if the document has several.
+    """
+    trie = StackTrie()
+    profiles = []
+    for label, doc in docs:
+        frame_map = trie.intern_frames(doc.get("shared", {}).get("frames", []))
+        doc_profiles = doc.get("profiles", [])
+        for profile in doc_profiles:
+            multiple = len(doc_profiles) > 1 and profile.get("name")
+            new_profile = {
+                **profile,
+                "name": f"{label}: {profile['name']}" if multiple else label,
+            }
+            if profile.get("type") == "sampled":
+                new_profile["samples"] = [
+                    [frame_map[frame] for frame in stack]
+                    for stack in profile["samples"]
+                ]
+            else:
+                new_profile["events"] = [
+                    {**event, "frame": frame_map[event["frame"]]}
+                    for event in profile["events"]
+                ]
+            profiles.append(new_profile)
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "shared": {"frames": trie.frames},
+        "profiles": profiles,
+    }
@@ -0,0 +1,290 @@
+"""Sample the stacks of every thread into a multi-profile speedscope document."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, List, Tuple
+
+from .diff import SPEEDSCOPE_SCHEMA
+
+if TYPE_CHECKING:
+    from types import CodeType, FrameType
+
+
+class ThreadStacks:
+    """The run-length encoded samples of one thread."""
+
+    def __init__(self, name: str) -> None:
+        """Start an empty profile of a thread."""
+        self.name = name
+        self.samples: List[Tuple[int, ...]] = []
+        self.weights: List[float] = []
+
+    def add(self, stack: Tuple[int, ...], weight: float) -> None:
+        """Add a sample, merging it with the last one if the stack is unchanged."""
+        if self.samples and self.samples[-1] == stack:
+            self.weights[-1] += weight
+        else:
+            self.samples.append(stack)
+            self.weights.append(weight)
+
+
+class StackSampler:
+    """Sample the Python stacks of all threads from a dedicated thread.
+
+    Each sample is weighted by the time since the previous one, so the profiles
+    stay accurate even when the sampler is delayed, e.g. by the GIL. Code objects
+    are only kept while running, and each start begins with no frames or threads.
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        """Create a sampler, which samples every ``interval`` seconds once started."""
+        self.interval = interval
+        self.is_running = False
+        self.frames: List[Dict[str, Any]] = []
+        self.threads: Dict[int, ThreadStacks] = {}
+        self.sample_count = 0
+        self._frame_ids: Dict[CodeType, int] = {}
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread, forgetting any earlier samples."""
+        self.frames = []
+        self.threads = {}
+        self.sample_count = 0
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ipyprofiler-sampler", daemon=True
+        )
+        self.is_running = True
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling, wait for the sampler thread, and release code objects."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._frame_ids.clear()
+        self.is_running = False
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stopping.wait(self.interval):
+            now = time.perf_counter()
+            self.sample(now - last, skip=own)
+            last = now
+
+    def sample(self, weight: float, skip: int | None = None) -> None:
+        """Record the current stack of every thread, except ``skip``."""
+        for ident, stack in self.stacks(skip):
+            thread = self.threads.get(ident)
+            if thread is None:
+                thread = self.threads[ident] = ThreadStacks(_thread_name(ident))
+            thread.add(stack, weight)
+        self.sample_count += 1
+
+    def stacks(self, skip: int | None = None) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        """Get the root-to-leaf frame ids of every thread, except ``skip``."""
+        frame_ids = self._frame_ids
+        for ident, frame in sys._current_frames().items():  # noqa: SLF001
+            if ident == skip:
+                continue
+            stack: List[int] = []
+            current: FrameType | None = frame
+            while current is not None:
+                code = current.f_code
+                frame_id = frame_ids.get(code)
+                if frame_id is None:
+                    frame_id = self._intern(code)
+                stack.append(frame_id)
+                current = current.f_back
+            stack.reverse()
+            yield ident, tuple(stack)
+
+    def _intern(self, code: CodeType) -> int:
+        """Add a frame for a code object."""
+        frame_id = self._frame_ids[code] = len(self.frames)
+        self.frames.append(
+            {
+                "name": getattr(code, "co_qualname", code.co_name),
+                "file": code.co_filename,
+                "line": code.co_firstlineno,
+            }
+        )
+        return frame_id
+
+    def to_document(self, name: str = "all threads") -> Dict[str, Any]:
+        """Build a speedscope document, with one sampled profile per thread."""
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "shared": {"frames": self.frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": f"{thread.name} ({ident})",
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(thread.weights),
+                    "samples": [list(stack) for stack in thread.samples],
+                    "weights": thread.weights,
+                }
+                for ident, thread in self.threads.items()
+            ],
+        }
+
+
+class RollingSampler(StackSampler):
+    """Keep sampling all threads, keeping only the most recent samples.
+
+    Samples are kept in a ring buffer of at most ``max_samples`` stacks, so memory
+    is bounded however long the sampler runs. Every ``refresh_interval`` seconds,
+    samples older than ``window`` are evicted, with any threads only they used, and
+    ``on_refresh`` is called from the sampler thread, e.g. to publish the last
+    ``window`` seconds. Frames no longer used are evicted when a thread is, or once
+    the frames have doubled since they were last compacted. The time spent sampling
+    and refreshing is measured, as a fraction of the time since starting, in
+    ``overhead``.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.001,
+        window: float = 30.0,
+        max_samples: int = 100_000,
+        refresh_interval: float = 1.0,
+        on_refresh: Callable[[RollingSampler], None] | None = None,
+    ) -> None:
+        """Create a sampler, which keeps sampling once started."""
+        super().__init__(interval=interval)
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.on_refresh = on_refresh
+        #: ``(at, thread, stack, weight)``, oldest first
+        self.buffer: Deque[Tuple[float, int, Tuple[int, ...], float]] = deque(
+            maxlen=max_samples
+        )
+        self.busy_time = 0.0
+        self.started_at = 0.0
+        self._compacted_frames = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start sampling, and measuring overhead."""
+        self.buffer.clear()
+        self._compacted_frames = 0
+        self.busy_time = 0.0
+        self.started_at = time.perf_counter()
+        super().start()
+
+    @property
+    def overhead(self) -> float:
+        """Get the fraction of time spent sampling and refreshing."""
+        elapsed = time.perf_counter() - self.started_at
+        return self.busy_time / elapsed if elapsed > 0 else 0.0
+
+    def _run(self) -> None:
+        """Take samples, and refresh, until stopped."""
+        own = threading.get_ident()
+        last = last_refresh = time.perf_counter()
+        while not self._stopping.wait(self.interval):
+            now = time.perf_counter()
+            self.sample(now - last, skip=own)
+            if now - last_refresh >= self.refresh_interval:
+                self.evict()
+                if self.on_refresh is not None:
+                    self.on_refresh(self)
+                last_refresh = now
+            last = now
+            self.busy_time += time.perf_counter() - now
+
+    def sample(self, weight: float, skip: int | None = None) -> None:
+        """Add the current stack of every thread, except ``skip``, to the buffer."""
+        now = time.perf_counter()
+        names = self.threads
+        with self._lock:
+            for ident, stack in self.stacks(skip):
+                if ident not in names:
+                    names[ident] = ThreadStacks(_thread_name(ident))
+                self.buffer.append((now, ident, stack, weight))
+        self.sample_count += 1
+
+    def evict(self) -> None:
+        """Drop samples older than ``window``, and any threads and frames unused."""
+        cutoff = time.perf_counter() - self.window
+        with self._lock:
+            buffer = self.buffer
+            while buffer and buffer[0][0] < cutoff:
+                buffer.popleft()
+            live = {ident for _, ident, _, _ in buffer}
+            dead = [ident for ident in self.threads if ident not in live]
+            for ident in dead:
+                del self.threads[ident]
+            if dead or len(self.frames) > 2 * self._compacted_frames:
+                self._compact_frames()
+
+    def _compact_frames(self) -> None:
+        """Renumber the frames used in the buffer, forgetting the rest."""
+        used = sorted({frame for _, _, stack, _ in self.buffer for frame in stack})
+        new_ids = {old: new for new, old in enumerate(used)}
+        self.frames = [self.frames[old] for old in used]
+        self._frame_ids = {
+            code: new_ids[old]
+            for code, old in self._frame_ids.items()
+            if old in new_ids
+        }
+        self.buffer = deque(
+            (
+                (at, ident, tuple(new_ids[frame] for frame in stack), weight)
+                for at, ident, stack, weight in self.buffer
+            ),
+            maxlen=self.buffer.maxlen,
+        )
+        self._compacted_frames = len(self.frames)
+
+    def window_document(self, name: str = "continuous") -> Dict[str, Any]:
+        """Build a speedscope document of the last ``window`` seconds, per thread.
+
+        Only the frames used in the window are included, and each distinct stack is
+        only renumbered once.
+        """
+        cutoff = time.perf_counter() - self.window
+        with self._lock:
+            buffer = list(self.buffer)
+            frames = list(self.frames)
+            names = {ident: thread.name for ident, thread in self.threads.items()}
+        threads: Dict[int, ThreadStacks] = {}
+        frame_map: Dict[int, int] = {}
+        stack_map: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+        for at, ident, stack, weight in buffer:
+            if at < cutoff:
+                continue
+            thread = threads.get(ident)
+            if thread is None:
+                thread = threads[ident] = ThreadStacks(names[ident])
+            new_stack = stack_map.get(stack)
+            if new_stack is None:
+                for frame in stack:
+                    if frame not in frame_map:
+                        frame_map[frame] = len(frame_map)
+                new_stack = stack_map[stack] = tuple(frame_map[f] for f in stack)
+            thread.add(new_stack, weight)
+        window = StackSampler()
+        window.frames = [dict(frames[frame]) for frame in frame_map]
+        window.threads = threads
+        return window.to_document(name)
+
+
+def _thread_name(ident: int) -> str:
+    """Find the name of a running thread."""
+    for thread in threading.enumerate():
+        if thread.ident == ident:
+            return thread.name
+    return "thread"
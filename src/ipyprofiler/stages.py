@@ -0,0 +1,51 @@
+"""Time the stages of turning a profile into something to show."""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from .benchmark import format_time
+
+#: logs the stages of every post-processing and render at ``DEBUG`` level
+logger = logging.getLogger(__name__)
+
+#: the seconds taken, and bytes produced, by a stage
+Stage = Dict[str, float]
+
+
+class StageTimer:
+    """Record the seconds, and bytes produced, of named stages, in order."""
+
+    def __init__(self, label: str) -> None:
+        """Start timing the stages of ``label``."""
+        self.label = label
+        self.stages: Dict[str, Stage] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Stage]:
+        """Time a stage, which may set the ``bytes`` it produced."""
+        record: Stage = {"seconds": 0.0, "bytes": 0}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - started
+            self.stages[name] = record
+
+    def to_dict(self) -> Dict[str, Stage]:
+        """Describe every stage, and the ``total`` seconds."""
+        total = sum(stage["seconds"] for stage in self.stages.values())
+        return {**self.stages, "total": {"seconds": total}}
+
+    def log(self) -> None:
+        """Log the stages, if ``logger`` is enabled for ``DEBUG``."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        stages = ", ".join(
+            f"{name} {format_time(stage['seconds'])} ({int(stage['bytes'])} bytes)"
+            for name, stage in self.stages.items()
+        )
+        logger.debug("%s: %s", self.label, stages)
@@ -0,0 +1,294 @@
+"""Columnar representation of evented speedscope profiles.
+
+Requires ``numpy``, available with ``pip install ipyprofiler[numpy]``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .callgraph import to_graph
+
+#: ``type`` codes for events
+OPEN, CLOSE = 1, 0
+
+
+class ProfileTable:
+    """Typed arrays of the events in an evented profile, with derived calls.
+
+    Every matched pair of open and close events is a call, with its frame, depth,
+    start, duration, parent call and self time. Calls left open are closed at the
+    last event, and ``balanced`` is ``False``.
+    """
+
+    def __init__(
+        self,
+        frames: List[Dict[str, Any]],
+        frame: np.ndarray,
+        at: np.ndarray,
+        kind: np.ndarray,
+    ) -> None:
+        """Build calls from ``frame`` (int32), ``at`` (float64) and ``kind`` (uint8)."""
+        self.frames = frames
+        self.frame = frame
+        self.at = at
+        self.kind = kind
+        self._build_calls()
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any], profile_index: int = 0) -> ProfileTable:
+        """Extract the events of an evented profile in a parsed document."""
+        frames = doc.get("shared", {}).get("frames", [])
+        profile = doc["profiles"][profile_index]
+        if profile.get("type", "evented") != "evented":
+            msg = f"""only evented profiles are supported, not {profile["type"]}"""
+            raise ValueError(msg)
+        events = profile["events"]
+        count = len(events)
+        frame = np.fromiter((e["frame"] for e in events), np.int32, count)
+        at = np.fromiter((e["at"] for e in events), np.float64, count)
+        kind = np.fromiter((e["type"] == "O" for e in events), np.uint8, count)
+        return cls(frames, frame, at, kind)
+
+    def _build_calls(self) -> None:
+        """Pair open and close events, and find each call's parent and self time."""
+        kind = self.kind.astype(np.int64)
+        step = 2 * kind - 1
+        depth_after = np.cumsum(step)
+        if depth_after.min(initial=0) < 0:
+            msg = "a close event has no matching open event"
+            raise ValueError(msg)
+        # close any calls left open at the end
+        unclosed = int(depth_after[-1]) if len(depth_after) else 0
+        self.balanced = unclosed == 0
+        if unclosed > 0:
+            last = self.at[-1]
+            kind = np.concatenate([kind, np.zeros(unclosed, np.int64)])
+            at = np.concatenate([self.at, np.full(unclosed, last)])
+            depth_after = np.concatenate(
+                [depth_after, depth_after[-1] - np.arange(1, unclosed + 1)]
+            )
+        else:
+            at = self.at
+
+        # opens and closes alternate at each depth, so pair them in order
+        level = np.where(kind == OPEN, depth_after, depth_after + 1)
+        order = np.lexsort((np.arange(len(level)), level))
+        open_idx, close_idx = order[0::2], order[1::2]
+        by_start = np.argsort(open_idx, kind="stable")
+        open_idx, close_idx = open_idx[by_start], close_idx[by_start]
+
+        self.call_frame = self.frame[open_idx]
+        self.call_depth = level[open_idx] - 1
+        self.call_start = at[open_idx]
+        self.call_time = at[close_idx] - self.call_start
+        self.call_open = open_idx
+        self.call_close = close_idx
+        self.call_parent = self._find_parents()
+
+        has_parent = self.call_parent >= 0
+        child_time = np.bincount(
+            self.call_parent[has_parent],
+            weights=self.call_time[has_parent],
+            minlength=len(self.call_time),
+        )
+        self.call_self_time = self.call_time - child_time
+
+    def _find_parents(self) -> np.ndarray:
+        """Find the enclosing call of each call, or ``-1`` for roots.
+
+        A parent is the last call opened before its child, one level up, so all are
+        found with one search of calls by ``(depth, open)``, however deep they go.
+        """
+        n_events = int(self.call_open.max(initial=0)) + 1
+        keys = self.call_depth.astype(np.int64) * n_events + self.call_open
+        order = np.argsort(keys, kind="stable")
+        found = np.searchsorted(keys[order], keys - n_events) - 1
+        return np.where(self.call_depth > 0, order[found], -1)
+
+    def outermost(self) -> np.ndarray:
+        """Find calls which are not nested inside a call of the same frame."""
+        n_events = int(self.call_close.max(initial=0)) + 2
+        by_frame = np.lexsort((self.call_open, self.call_frame))
+        close_key = self.call_close[by_frame] + self.call_frame[by_frame] * n_events
+        prior_close = np.maximum.accumulate(close_key)
+        prior_close = np.concatenate([[-1], prior_close[:-1]])
+        open_key = self.call_open[by_frame] + self.call_frame[by_frame] * n_events
+        outermost = np.empty(len(by_frame), bool)
+        outermost[by_frame] = open_key > prior_close
+        return outermost
+
+    def frame_stats(self) -> Dict[str, np.ndarray]:
+        """Get per-frame ``time``, ``self_time`` and ``calls``, indexed by frame."""
+        n_frames = max(len(self.frames), int(self.call_frame.max(initial=-1)) + 1)
+        outermost = self.outermost()
+        return {
+            "time": np.bincount(
+                self.call_frame[outermost],
+                weights=self.call_time[outermost],
+                minlength=n_frames,
+            ),
+            "self_time": np.bincount(
+                self.call_frame, weights=self.call_self_time, minlength=n_frames
+            ),
+            "calls": np.bincount(self.call_frame, minlength=n_frames),
+        }
+
+    def edge_stats(self) -> Dict[str, np.ndarray]:
+        """Get per-``(caller, callee)`` ``calls``, ``time`` and ``self_time``.
+
+        Edges are in order of their first call.
+        """
+        child = np.flatnonzero(self.call_parent >= 0)
+        source = self.call_frame[self.call_parent[child]].astype(np.int64)
+        target = self.call_frame[child].astype(np.int64)
+        n_frames = max(len(self.frames), int(self.call_frame.max(initial=-1)) + 1)
+        keys, first, inverse = np.unique(
+            source * n_frames + target, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        edge = rank[inverse]
+        keys = keys[order]
+        return {
+            "source": keys // n_frames,
+            "target": keys % n_frames,
+            "calls": np.bincount(edge, minlength=len(keys)),
+            "time": np.bincount(
+                edge, weights=self.call_time[child], minlength=len(keys)
+            ),
+            "self_time": np.bincount(
+                edge, weights=self.call_self_time[child], minlength=len(keys)
+            ),
+        }
+
+    def top(self, count: int = 10, by: str = "self_time") -> List[Dict[str, Any]]:
+        """Get the frames with the most ``self_time``, ``time`` or ``calls``."""
+        stats = self.frame_stats()
+        ranked = np.argsort(-stats[by], kind="stable")[:count]
+        return [
+            {
+                **self.frames[i],
+                **{key: values[i].item() for key, values in stats.items()},
+            }
+            for i in ranked
+            if stats["calls"][i]
+        ]
+
+    def to_callgraph(self) -> Dict[str, Any]:
+        """Build the same callgraph as ``build_callgraph``, from the arrays."""
+        stats = self.frame_stats()
+        node_stats = {
+            i: [stats["time"][i].item(), stats["self_time"][i].item()]
+            for i in self._called_frames()
+        }
+        edges = self.edge_stats()
+        edge_stats = {
+            (int(s), int(t)): [int(c), tm, st]
+            for s, t, c, tm, st in zip(
+                edges["source"],
+                edges["target"],
+                edges["calls"],
+                edges["time"].tolist(),
+                edges["self_time"].tolist(),
+            )
+        }
+        return to_graph(self.frames, edge_stats, node_stats)
+
+    def to_summary(self, call_counts: List[int] | None = None) -> List[Dict[str, Any]]:
+        """Build the same rows as ``summarize_frames``, from the arrays.
+
+        Exact ``call_counts``, e.g. from ``cProfile``, replace the counted calls.
+        """
+        stats = self.frame_stats()
+        calls = dict(
+            enumerate(stats["calls"].tolist() if call_counts is None else call_counts)
+        )
+        total = stats["self_time"].sum().item() or 1
+        rows = []
+        for i in self._called_frames():
+            time = stats["time"][i].item()
+            rows += [
+                {
+                    "frame": i,
+                    "name": self.frames[i].get("name", ""),
+                    "file": self.frames[i].get("file"),
+                    "line": self.frames[i].get("line"),
+                    "time": time,
+                    "self_time": stats["self_time"][i].item(),
+                    "calls": calls.get(i, 0),
+                    "fraction": time / total,
+                }
+            ]
+        return rows
+
+    def _called_frames(self) -> List[int]:
+        """Get the frames which were called, in order of their first call."""
+        seen, first = np.unique(self.call_frame, return_index=True)
+        return seen[np.argsort(first, kind="stable")].tolist()
+
+
+def stack_times(
+    runs: Sequence[Tuple[ProfileTable, Sequence[int]]],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the distinct call stacks of tables, with frames mapped to shared ids.
+
+    Stacks are numbered one depth at a time, so parents come before their children
+    and ``parents`` never decreases. Returns the parent and frame of each stack, and
+    the self time of each stack in each run.
+    """
+    sizes = [len(table.call_frame) for table, _ in runs]
+    offsets = np.cumsum([0, *sizes[:-1]])
+    frame = np.concatenate(
+        [np.asarray(frame_map, np.int64)[table.call_frame] for table, frame_map in runs]
+    )
+    parent = np.concatenate(
+        [
+            np.where(table.call_parent >= 0, table.call_parent + offset, -1)
+            for (table, _), offset in zip(runs, offsets)
+        ]
+    )
+    depth = np.concatenate([table.call_depth for table, _ in runs])
+    n_frames = int(frame.max(initial=-1)) + 1
+
+    by_depth = np.argsort(depth, kind="stable")
+    bounds = np.searchsorted(depth[by_depth], np.arange(depth.max(initial=-1) + 2))
+    call_stack = np.zeros(len(frame), np.int64)
+    parents, frames = [], []
+    n_stacks = 0
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        calls = by_depth[lo:hi]
+        parent_stack = np.where(parent[calls] >= 0, call_stack[parent[calls]], -1)
+        keys, inverse = np.unique(
+            (parent_stack + 1) * n_frames + frame[calls], return_inverse=True
+        )
+        call_stack[calls] = n_stacks + inverse.ravel()
+        parents += [keys // n_frames - 1]
+        frames += [keys % n_frames]
+        n_stacks += len(keys)
+
+    run = np.repeat(np.arange(len(runs)), sizes)
+    self_time = np.concatenate([table.call_self_time for table, _ in runs])
+    times = np.bincount(
+        run * n_stacks + call_stack, weights=self_time, minlength=len(runs) * n_stacks
+    )
+    return (
+        np.concatenate([np.zeros(0, np.int64), *parents]),
+        np.concatenate([np.zeros(0, np.int64), *frames]),
+        times.reshape(len(runs), n_stacks),
+    )
+
+
+def stack_paths(parents: np.ndarray, frames: np.ndarray) -> List[Tuple[int, ...]]:
+    """Get the root-to-leaf frames of every stack from ``stack_times``.
+
+    Parents come before their children, so each path extends an already-built one.
+    """
+    paths: List[Tuple[int, ...]] = []
+    root: Tuple[int, ...] = ()
+    for parent, frame in zip(parents.tolist(), frames.tolist()):
+        paths.append((paths[parent] if parent != -1 else root) + (frame,))
+    return paths
@@ -2,15 +2,22 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import asyncio
+from contextlib import contextmanager, suppress
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List
 
 import ipywidgets as W
 import jinja2
 import traitlets as T
 
 from .constants import SPEEDSCOPE_SIMPLE_JSON, DOMClasses, MermaidDirection
+from .stages import StageTimer
 from .widget_profile import ProfileJSON
 
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
 CSS_COLLAPSED = "jprf-Callgraph-Options-expanded"
 
 #: syntactically-meaningful characters to escape in mermaid labels
@@ -27,6 +34,15 @@ MERMAID_ESCAPE = {
     "\\": 92,
 }
 
+#: ``str.translate`` tables for ``MERMAID_ESCAPE``, by entity prefix for (non-)elk
+MERMAID_ESCAPE_TABLES = {
+    prefix: str.maketrans({k: f"{prefix}{v};" for k, v in MERMAID_ESCAPE.items()})
+    for prefix in ["#", "&#"]
+}
+
+#: a shared environment for compiling templates
+JINJA_ENV = jinja2.Environment()  # noqa: S701
+
 DEFAULT_MERMAID_TEMPLATE = """%%{init: {"flowchart": {{ mermaid_options | tojson }}} }%%
 flowchart {{ direction }}
 
@@ -88,14 +104,35 @@ flowchart {{ direction }}
 
 CHECKBOX_TRAITS = ["show_time", "group_by_file", "use_elk"]
 SELECT_TRAITS = {"direction": MermaidDirection}
-SLIDER_TRAITS = ["first_edge", "last_edge", "time_precision"]
+SLIDER_TRAITS = [
+    "first_edge",
+    "last_edge",
+    "time_precision",
+    "profile_index",
+    "max_nodes",
+    "max_depth",
+]
+FLOAT_SLIDER_TRAITS = ["min_time_fraction"]
 OPTION_GROUPS = {
     "Layout": ["direction", "use_elk"],
-    "Content": ["show_time", "group_by_file", "time_precision"],
+    "Content": ["profile_index", "show_time", "group_by_file", "time_precision"],
     "Playback": ["first_edge", "last_edge"],
+    "Pruning": ["max_nodes", "max_depth", "min_time_fraction"],
 }
 
-RENDER_ON_TRAITS = [*CHECKBOX_TRAITS, *SELECT_TRAITS, *SLIDER_TRAITS, "template"]
+RENDER_ON_TRAITS = [
+    *CHECKBOX_TRAITS,
+    *SELECT_TRAITS,
+    *SLIDER_TRAITS,
+    *FLOAT_SLIDER_TRAITS,
+    "template",
+]
+
+
+@lru_cache(maxsize=16)
+def _compile_template(template: str) -> jinja2.Template:
+    """Compile (and cache) a template string."""
+    return JINJA_ENV.from_string(template)
 
 
 def no_elk(widgets: dict[str, W.Widget]) -> bool:
@@ -132,6 +169,39 @@ class Callgraph(W.HBox):
     direction: MermaidDirection = T.UseEnum(MermaidDirection)
     first_edge: int = T.Int(-1).tag(sync=True)
     last_edge: int = T.Int(-1).tag(sync=True)
+    profile_index: int = T.Int(
+        0, min=-1, help="the profile to show, or -1 to merge all profiles"
+    ).tag(sync=True)
+    profile_count: int = T.Int(
+        0, read_only=True, help="the number of profiles in ``profile``"
+    )
+    max_nodes: int = T.Int(
+        -1, min=-1, help="the most nodes to show, or -1 to show all"
+    ).tag(sync=True)
+    max_depth: int = T.Int(
+        -1, min=-1, help="the deepest call to show, or -1 to show all"
+    ).tag(sync=True)
+    min_time_fraction: float = T.Float(
+        0.0, min=0.0, max=1.0, help="the smallest fraction of total time to show"
+    ).tag(sync=True)
+
+    render_delay: float = T.Float(
+        0.1, min=0.0, help="seconds to wait for more option changes before rendering"
+    )
+    render_count: int = T.Int(0, read_only=True, help="renders performed")
+    render_skip_count: int = T.Int(
+        0, read_only=True, help="render requests coalesced into another render"
+    )
+    render_timings: Dict[str, Dict[str, float]] = T.Dict(
+        read_only=True, help="the seconds, and bytes produced, of each stage of render"
+    )
+
+    _render_held: bool = T.Bool(default_value=False)
+    _render_pending: bool = T.Bool(default_value=False)
+    _render_from_frontend: bool = T.Bool(default_value=False)
+    _render_handle: asyncio.TimerHandle | None = T.Instance(
+        asyncio.TimerHandle, allow_none=True
+    )
 
     def __init__(self, **kwargs: Any):
         """Create a new callgraph widget."""
@@ -139,27 +209,100 @@ class Callgraph(W.HBox):
         self.children = self._default_children()
         self.add_class(DOMClasses.callgraph.value)
 
+    @contextmanager
+    def hold_trait_notifications(self) -> Generator[None, None, None]:
+        """Hold trait notifications, rendering at most once afterwards."""
+        if self._render_held:
+            yield
+            return
+        self._render_held = True
+        try:
+            with super().hold_trait_notifications():
+                yield
+        finally:
+            self._render_held = False
+        if self._render_pending:
+            self._request_render()
+
+    def set_state(self, sync_data: Dict[str, Any]) -> None:
+        """Apply changes from the browser, debouncing any render they request."""
+        with self.from_frontend():
+            super().set_state(sync_data)
+
+    @contextmanager
+    def from_frontend(self) -> Generator[None, None, None]:
+        """Treat changes in the block as from the browser, debouncing their render."""
+        previous = self._render_from_frontend
+        self._render_from_frontend = True
+        try:
+            yield
+        finally:
+            self._render_from_frontend = previous
+
     @T.observe(*RENDER_ON_TRAITS)
+    def _on_render_trait(self, *_change: T.Bunch) -> None:
+        """Request a render, coalescing held and rapid changes."""
+        if self._render_pending:
+            self.set_trait("render_skip_count", self.render_skip_count + 1)
+        self._render_pending = True
+
+        if not self._render_held:
+            self._request_render()
+
+    def _request_render(self) -> None:
+        """Render now, or after ``render_delay`` for changes from the browser."""
+        loop = None
+        if self._render_from_frontend and self.render_delay:
+            with suppress(RuntimeError):
+                loop = asyncio.get_running_loop()
+
+        if loop is None:
+            self.render()
+            return
+
+        if self._render_handle is not None:
+            self._render_handle.cancel()
+        self._render_handle = loop.call_later(self.render_delay, self.render)
+
     def render(self, *_change: T.Bunch) -> None:
         """Update the output."""
-        self.output.outputs = (
-            {
-                "output_type": "display_data",
-                "data": {"text/vnd.mermaid": self._mermaid()},
-                "metadata": {},
-            },
-        )
+        if self._render_handle is not None:
+            self._render_handle.cancel()
+            self._render_handle = None
+        self._render_pending = False
+        self.set_trait("render_count", self.render_count + 1)
+        timer = StageTimer("rendering callgraph")
+        with timer.stage("callgraph"):
+            context = self._context()
+        with timer.stage("template") as stage:
+            mermaid = _compile_template(self.template).render(context)
+            stage["bytes"] = len(mermaid)
+        with timer.stage("output"):
+            self.output.outputs = (
+                {
+                    "output_type": "display_data",
+                    "data": {"text/vnd.mermaid": mermaid},
+                    "metadata": {},
+                },
+            )
+        self.set_trait("render_timings", timer.to_dict())
+        timer.log()
 
     def _mermaid(self) -> str:
         """Get a mermaid string."""
-        template = jinja2.Template(self.template)
+        template = _compile_template(self.template)
         context = self._context()
         return template.render(context)
 
     def _context(self) -> dict[str, Any]:
         """Get a rendering context."""
         context = {
-            **self.profile.to_callgraph(),
+            **self.profile.to_callgraph(
+                self.profile_index,
+                max_nodes=self.max_nodes,
+                min_time_fraction=self.min_time_fraction,
+                max_depth=self.max_depth,
+            ),
             "show_time": self.show_time,
             "time_precision": self.time_precision,
             "group_by_file": self.group_by_file,
@@ -183,23 +326,46 @@ class Callgraph(W.HBox):
     def _add_mermaid_escape(self, context: Dict[str, Any]) -> None:
         """Add mermaid escape utility to rendering context."""
         use_elk = context.get("mermaid_options", {}).get("defaultRenderer") == "elk"
-        prefix = "&#" if use_elk else "#"
+        table = MERMAID_ESCAPE_TABLES["&#" if use_elk else "#"]
 
         def mermaid_escape(text: str) -> str:
-            for pattern, code in MERMAID_ESCAPE.items():
-                text = text.replace(pattern, f"{prefix}{code};")
-
-            return text.strip()
+            return text.translate(table).strip()
 
         context["escape_mmd"] = mermaid_escape
 
+    @T.validate("profile_index")
+    def _validate_profile_index(self, proposal: T.Bunch) -> int:
+        """Only allow the index of a profile, or ``-1`` to merge them all."""
+        index = proposal.value
+        # ``profile_count`` may not yet be observed, as when both are given at once
+        count = len(self._profiles())
+        if index > max(count - 1, 0):
+            msg = f"profile_index {index} is out of range of {count}"
+            raise T.TraitError(msg)
+        return index
+
+    def _profiles(self) -> List[Dict[str, Any]]:
+        """Get the profiles of the current value, if any."""
+        if not self.profile.value:
+            return []
+        return self.profile.parsed().get("profiles", [])
+
     @T.observe("profile")
     def _on_profile_change(self, change: T.Bunch) -> None:
         """Handle a change of profile."""
         if isinstance(change.old, ProfileJSON):
-            change.old.unobserve(self.render, "value")
-        self.profile.observe(self.render, "value")
-        self.render()
+            change.old.unobserve(self._on_profile_value, "value")
+        self.profile.observe(self._on_profile_value, "value")
+        self._on_profile_value()
+
+    def _on_profile_value(self, *_change: T.Bunch) -> None:
+        """Count the profiles of a new value, clamping ``profile_index``, and render."""
+        profiles = self._profiles()
+        with self.hold_trait_notifications():
+            self.set_trait("profile_count", len(profiles))
+            if self.profile_index >= len(profiles):
+                self.profile_index = max(len(profiles) - 1, 0)
+            self._render_pending = True
 
     @T.default("children")
     def _default_children(self) -> List[W.Widget]:
@@ -226,7 +392,10 @@ class Callgraph(W.HBox):
     @T.default("profile")
     def _default_profile(self) -> ProfileJSON:
         """Provide a default profile."""
-        return ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+        profile = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+        profile.observe(self._on_profile_value, "value")
+        self.set_trait("profile_count", len(profile.parsed()["profiles"]))
+        return profile
 
     @T.default("template")
     def _default_template(self) -> str:
@@ -263,7 +432,7 @@ class CallgraphOptions(W.VBox):
             for trait in traits:
                 if trait in CHECKBOX_TRAITS:
                     child = W.Checkbox(description=trait.replace("_", " "))
-                    T.link((self.parent, trait), (child, "value"))
+                    self._link(trait, child)
                     children += [child]
                 elif trait in SELECT_TRAITS:
                     child = W.SelectionSlider(
@@ -272,13 +441,25 @@ class CallgraphOptions(W.VBox):
                             (e.name.replace("_", " "), e) for e in SELECT_TRAITS[trait]
                         ],
                     )
-                    T.link((self.parent, trait), (child, "value"))
+                    self._link(trait, child)
                     children += [child]
                 elif trait in SLIDER_TRAITS:
                     child = W.IntSlider(
                         description=trait.replace("_", " "), min=-1, max=10000
                     )
-                    T.link((self.parent, trait), (child, "value"))
+                    self._link(trait, child)
+                    if trait == "profile_index":
+                        T.dlink(
+                            (self.parent, "profile_count"),
+                            (child, "max"),
+                            lambda count: max(count - 1, 0),
+                        )
+                    children += [child]
+                elif trait in FLOAT_SLIDER_TRAITS:
+                    child = W.FloatSlider(
+                        description=trait.replace("_", " "), min=0, max=1, step=0.01
+                    )
+                    self._link(trait, child)
                     children += [child]
                 else:  # pragma: no cover
                     continue
@@ -294,3 +475,18 @@ class CallgraphOptions(W.VBox):
         self.parent.observe(_on_change)
 
         return groups
+
+    def _link(self, trait: str, child: W.ValueWidget) -> None:
+        """Link a control to a trait, debouncing renders for changes in the browser.
+
+        Controls sync their own state, so their changes never reach the parent's
+        ``set_state``.
+        """
+        T.link((self.parent, trait), (child, "value"))
+        set_state = child.set_state
+
+        def set_state_from_frontend(sync_data: Dict[str, Any]) -> None:
+            with self.parent.from_frontend():
+                set_state(sync_data)
+
+        child.set_state = set_state_from_frontend
@@ -0,0 +1,87 @@
+"""Convenience wrapper widget for ``cProfile``."""
+
+from __future__ import annotations
+
+import cProfile
+import json
+from typing import Any, Dict
+
+import ipywidgets as W
+import traitlets as T
+
+from .constants import AUTO_INTERVAL, AsyncMode
+from .cprofile import DEFAULT_MAX_STACKS, DEFAULT_MIN_TIME_FRACTION, pstats_to_document
+from .widget_pyinstrument import Pyinstrument
+
+#: the ``pstats`` name of the call which stops a ``cProfile.Profile``
+CPROFILE_DISABLE = "<method 'disable' of '_lsprof.Profiler' objects>"
+
+
+@W.register
+class CProfile(Pyinstrument):
+    """Display a deterministic ``cProfile`` profile, with exact call counts.
+
+    ``interval``, ``async_mode`` and ``processor_options`` only configure
+    ``pyinstrument``, and are ignored.
+    """
+
+    interval: float | str = T.Union(
+        [T.Float(), T.Enum([AUTO_INTERVAL])],
+        default_value=0.001,
+        help="ignored: ``cProfile`` records every call, without sampling",
+    )
+    async_mode: AsyncMode = T.UseEnum(
+        AsyncMode, help="ignored: ``cProfile`` does not follow ``async`` tasks"
+    )
+    processor_options: Dict[str, Any] = T.Dict(
+        help="ignored: ``cProfile`` statistics are not post-processed"
+    )
+
+    min_time_fraction: float = T.Float(
+        DEFAULT_MIN_TIME_FRACTION,
+        min=0.0,
+        max=1.0,
+        help="the smallest fraction of total time to expand into callees",
+    )
+    max_stacks: int = T.Int(
+        DEFAULT_MAX_STACKS, min=1, help="the most call stacks to expand"
+    )
+
+    _profiler: cProfile.Profile = T.Instance(cProfile.Profile)
+    _running: bool = T.Bool(default_value=False)
+    _samples: bool = T.Bool(default_value=False, help="``cProfile`` records every call")
+
+    def _start_profiler(self) -> None:
+        """Start collecting ``cProfile`` statistics."""
+        self._profiler.enable()
+        self._running = True
+
+    def _stop_profiler(self) -> None:
+        """Stop collecting ``cProfile`` statistics, if running."""
+        if self._running:
+            self._profiler.disable()
+            self._running = False
+
+    def _speedscope_json(self, profiler: cProfile.Profile) -> str:
+        """Convert the statistics of a stopped profiler to speedscope JSON."""
+        profiler.create_stats()
+        stats: Dict[Any, Any] = {
+            key: value
+            for key, value in profiler.stats.items()
+            if key[2] != CPROFILE_DISABLE
+        }
+        doc = pstats_to_document(
+            stats,
+            min_time_fraction=self.min_time_fraction,
+            max_stacks=self.max_stacks,
+        )
+        return json.dumps(doc)
+
+    @T.default("_profiler")
+    def _default_profiler(self) -> cProfile.Profile:
+        """Provide a new ``cProfile`` profiler."""
+        return self._make_profiler(self.sample_interval)
+
+    def _make_profiler(self, _interval: float) -> cProfile.Profile:
+        """Create a ``cProfile`` profiler, which does not sample."""
+        return cProfile.Profile()
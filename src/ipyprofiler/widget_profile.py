@@ -2,94 +2,302 @@
 
 from __future__ import annotations
 
+import gzip
 import json
 import re
 import site
+import zlib
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
 
 import ipywidgets as W
 import traitlets as T
 
+from .archive import read_profile
 from .base import IPyProfilerBase
+from .callgraph import build_callgraph, prune_callgraph, summarize_frames
+from .constants import EXTRAS_KEY, Compression
+
+if TYPE_CHECKING:
+    from .table import ProfileTable
+
+#: frame fields which ``json_rewrites`` are applied to
+REWRITE_FRAME_KEYS = ["name", "file"]
+
+#: numbered backreferences, which change meaning when a pattern is nested in a group
+NUMBERED_REFERENCE = re.compile(r"\\[1-9]|\(\?\(\d")
+
+
+def _value_to_json(value: str | None, widget: ProfileJSON) -> Any:
+    """Serialize ``value``, optionally as a compressed binary buffer."""
+    if value is None or widget.compression == Compression.none:
+        widget.set_trait("sent_bytes", len(value or ""))
+        return value
+    packed = _pack(value, widget.compression, widget.compression_level)
+    widget.set_trait("sent_bytes", len(packed))
+    return {"compression": widget.compression.value, "buffer": memoryview(packed)}
+
+
+@lru_cache(maxsize=1)
+def _pack(value: str, compression: Compression, level: int) -> bytes:
+    """Compress ``value``, keeping the last result for measuring, then sending."""
+    raw = value.encode("utf-8")
+    if compression == Compression.gzip:
+        return gzip.compress(raw, compresslevel=level, mtime=0)
+    return zlib.compress(raw, level)
+
+
+def _value_from_json(value: Any, _widget: ProfileJSON) -> str | None:
+    """Deserialize ``value``, decompressing a binary buffer if needed."""
+    if not isinstance(value, dict):
+        return value
+    packed = bytes(value["buffer"])
+    if value["compression"] == Compression.gzip.value:
+        return gzip.decompress(packed).decode("utf-8")
+    return zlib.decompress(packed).decode("utf-8")
+
+
+@lru_cache(maxsize=8)
+def _compile_rewrites(
+    rewrites: Tuple[Tuple[str, str], ...],
+) -> Callable[[str], str] | None:
+    """Compile rewrite patterns into as few passes as possible, tried in order.
+
+    Runs of patterns which can be safely combined share a single alternation, with
+    earlier patterns taking precedence. Patterns with global inline flags, such as
+    ``(?i)``, or numbered backreferences are each applied with their own ``re.sub``.
+    """
+    if not rewrites:
+        return None
+    passes: List[Callable[[str], str]] = []
+    run: List[Tuple[re.Pattern[str], str]] = []
+    for pattern, replacement in rewrites:
+        compiled = re.compile(pattern)
+        if _can_combine(compiled):
+            run += [(compiled, replacement)]
+            continue
+        passes += [*_combine_rewrites(run), partial(compiled.sub, replacement)]
+        run = []
+    passes += _combine_rewrites(run)
+
+    def _rewrite(text: str) -> str:
+        for rewrite in passes:
+            text = rewrite(text)
+        return text
+
+    return passes[0] if len(passes) == 1 else _rewrite
+
+
+def _can_combine(pattern: re.Pattern[str]) -> bool:
+    """Check whether a pattern means the same when nested in an alternation."""
+    return not pattern.flags & ~re.UNICODE and not NUMBERED_REFERENCE.search(
+        pattern.pattern
+    )
+
+
+def _combine_rewrites(
+    run: List[Tuple[re.Pattern[str], str]],
+) -> List[Callable[[str], str]]:
+    """Combine patterns into one alternation, or one pass each if they clash."""
+    separate = [partial(pattern.sub, replacement) for pattern, replacement in run]
+    if len(run) <= 1:
+        return separate
+    groups = (f"(?P<_r{i}>{pattern.pattern})" for i, (pattern, _) in enumerate(run))
+    try:
+        alternation = re.compile("|".join(groups))
+    except re.error:
+        return separate
+
+    def _replace(match: re.Match[str]) -> str:
+        # the outermost group closes last, so names the pattern which matched
+        pattern, replacement = run[int(match.lastgroup[2:])]
+        # matching again in the whole string keeps any lookarounds and anchors
+        return pattern.match(match.string, match.start()).expand(replacement)
+
+    return [partial(alternation.sub, _replace)]
 
 
 @W.register
 class ProfileJSON(IPyProfilerBase):
     """A widget containing speedscope-compatible JSON."""
 
-    value: str = T.Unicode(allow_none=True).tag(sync=True)
+    value: str = T.Unicode(allow_none=True).tag(
+        sync=True, to_json=_value_to_json, from_json=_value_from_json
+    )
+    compression: Compression = T.UseEnum(
+        Compression,
+        default_value=Compression.none,
+        help="codec for syncing ``value`` to the browser as a binary buffer",
+    )
+    compression_level: int = T.Int(1, min=1, max=9, help="codec effort level")
+    sent_bytes: int = T.Int(
+        0, read_only=True, help="the size of ``value`` as last sent to the browser"
+    )
+
+    _cache: Dict[str, Any] = T.Dict(help="derived data, keyed by analysis")
+    _cache_key: int | None = T.Int(allow_none=True, help="hash of the cached value")
 
     name: str = T.Unicode().tag(sync=True)
     json_rewrites: dict[str, Any] = T.Dict(
-        help="regular expressions to replace in raw JSON"
+        help="regular expressions to replace in frame names and files"
     )
 
     _model_name: str = T.Unicode("ProfileJSONModel").tag(sync=True)
     _view_name: str = T.Unicode("ProfileJSONView").tag(sync=True)
 
-    def to_callgraph(self) -> Dict[str, Any]:
-        """Generate a callgraph from a speedscope profile."""
-        fp = json.loads(self.value)
-        nodes = []
-        groups = {}
-        edges = []
-        if "profiles" in fp:
-            fp0 = fp["profiles"][0]
-
-            for i, frame in enumerate(fp["shared"]["frames"]):
-                nodes += [{"id": f"n-{i}", **frame}]
-                frame_file = frame.get("file")
-                if frame_file is not None:
-                    if frame_file not in groups:
-                        groups[frame_file] = {
-                            "id": f"g-{len(groups)}",
-                            "file": frame_file,
-                            "nodes": [],
-                        }
-                    groups[frame_file]["nodes"].append(f"n-{i}")
-
-            stack = []
-            observed = []
-            for e in fp0["events"]:
-                if e["type"] == "O":
-                    edge = {
-                        "opened": e,
-                        "closed": None,
-                        "parent": stack[0] if stack else None,
-                    }
-                    observed += [edge]
-                    stack.insert(0, edge)
-                elif e["type"] == "C":  # pragma: no cover
-                    stack[0]["closed"] = e
-                    stack.remove(stack[0])
-
-            for o in observed:
-                parent = o["parent"]
-                if parent is None:
-                    continue
-                opened = o["opened"]
-                closed = o["closed"]
-                edge = {
-                    "id": f"e-{len(edges)}",
-                    "source": f"""n-{parent["opened"]["frame"]}""",
-                    "target": f"""n-{closed["frame"]}""",
-                    "time": closed["at"] - opened["at"],
-                }
-                edges += [edge]
-        return {"nodes": nodes, "edges": edges, "groups": [*groups.values()]}
+    @classmethod
+    def from_path(cls, path: Path, **kwargs: Any) -> ProfileJSON:
+        """Load a (compressed) speedscope file."""
+        kwargs.setdefault("name", path.name)
+        return cls(value=read_profile(path), **kwargs)
+
+    @T.observe("compression", "compression_level")
+    def _on_compression(self, *_change: T.Bunch) -> None:
+        """Re-send ``value`` with the new codec."""
+        self.send_state("value")
+
+    @T.observe("value", "json_rewrites")
+    def _on_value(self, *_change: T.Bunch) -> None:
+        """Invalidate derived data."""
+        self._cache = {}
+        self._cache_key = None
+
+    def payload_bytes(self) -> int:
+        """Get the size of ``value`` as synced to the browser, after any compression.
+
+        Unlike ``sent_bytes``, this does not depend on whether ``value`` was sent.
+        """
+        if self.value is None or self.compression == Compression.none:
+            return len(self.value or "")
+        return len(_pack(self.value, self.compression, self.compression_level))
+
+    def _cached(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Get (or build) derived data, valid until ``value`` changes.
+
+        Cached values are shared, and must not be mutated by callers.
+        """
+        value_hash = hash(self.value)
+        if self._cache_key != value_hash:
+            self._cache = {}
+            self._cache_key = value_hash
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    def parsed(self) -> Dict[str, Any]:
+        """Get the parsed speedscope document."""
+        return self._cached("parsed", lambda: json.loads(self.value))
+
+    def to_table(self, profile_index: int = 0) -> ProfileTable:
+        """Get a (cached) columnar table of an evented profile.
+
+        Requires ``numpy``.
+        """
+        from .table import ProfileTable
+
+        return self._cached(
+            f"table-{profile_index}",
+            lambda: ProfileTable.from_document(self.parsed(), profile_index),
+        )
+
+    def _evented_table(self, profile_index: int) -> ProfileTable | None:
+        """Get a table of one balanced evented profile, if ``numpy`` is installed.
+
+        Otherwise, as for sampled profiles or all profiles, get ``None``.
+        """
+        profiles = self.parsed().get("profiles", [])
+        if not 0 <= profile_index < len(profiles):
+            return None
+        if profiles[profile_index].get("type", "evented") != "evented":
+            return None
+        try:
+            table = self.to_table(profile_index)
+        except (ImportError, ValueError):
+            return None
+        return table if table.balanced else None
+
+    def to_callgraph(
+        self,
+        profile_index: int = 0,
+        max_nodes: int = -1,
+        min_time_fraction: float = 0.0,
+        max_depth: int = -1,
+    ) -> Dict[str, Any]:
+        """Get a (cached) callgraph from a speedscope profile.
+
+        A ``profile_index`` of ``-1`` merges all profiles. The other arguments
+        prune the graph, with negative values meaning no limit. Only the latest
+        pruned graph is kept, so dragging a slider does not fill the cache. With
+        ``numpy``, an evented profile is aggregated from its ``to_table``.
+        """
+        key = f"callgraph-{profile_index}"
+        graph = self._cached(key, lambda: self._build_callgraph(profile_index))
+        limits = (max_nodes, min_time_fraction, max_depth)
+        pruned = self._cache.get(f"{key}-pruned")
+        if pruned is None or pruned[0] != limits:
+            pruned = self._cache[f"{key}-pruned"] = (
+                limits,
+                prune_callgraph(graph, *limits),
+            )
+        return pruned[1]
+
+    def _build_callgraph(self, profile_index: int) -> Dict[str, Any]:
+        """Build a callgraph, from the table of an evented profile if possible."""
+        table = self._evented_table(profile_index)
+        if table is None:
+            return build_callgraph(self.parsed(), profile_index)
+        return table.to_callgraph()
+
+    def to_summary(self, profile_index: int = 0) -> List[Dict[str, Any]]:
+        """Get (cached) per-frame rows of total and self time, calls and share.
+
+        With ``numpy``, an evented profile is summarized from its ``to_table``.
+        """
+        return self._cached(
+            f"summary-{profile_index}",
+            lambda: self._summarize_frames(profile_index),
+        )
+
+    def _summarize_frames(self, profile_index: int) -> List[Dict[str, Any]]:
+        """Summarize frames, from the table of an evented profile if possible."""
+        table = self._evented_table(profile_index)
+        if table is None:
+            return summarize_frames(self.parsed(), profile_index)
+        return table.to_summary(self.parsed().get(EXTRAS_KEY, {}).get("call_counts"))
 
     def rewrite_speedscope_json(self, raw: str, name: str | None = None) -> str:
-        """Replace strings in JSON."""
-        for pattern, replacement in self.json_rewrites.items():
-            raw = re.sub(pattern, replacement, raw)
+        """Replace strings in frame names and files, and optionally rename.
+
+        The document is parsed, and serialized, once: see ``rewrite_speedscope``.
+        """
+        return json.dumps(self.rewrite_speedscope(json.loads(raw), name=name))
+
+    def rewrite_speedscope(
+        self, profile_data: Dict[str, Any], name: str | None = None
+    ) -> Dict[str, Any]:
+        """Replace strings in the frame names and files of a parsed document.
+
+        All ``json_rewrites`` are applied in a single pass per field, with earlier
+        patterns taking precedence, and the document is changed in place. When
+        renaming a document with several profiles, e.g. one per thread, the name is
+        prefixed to each profile's own name.
+        """
+        rewrite = _compile_rewrites(tuple(self.json_rewrites.items()))
+        if rewrite is not None:
+            for frame in profile_data.get("shared", {}).get("frames", []):
+                for key in REWRITE_FRAME_KEYS:
+                    value = frame.get(key)
+                    if isinstance(value, str):
+                        frame[key] = rewrite(value)
         if name is not None:
-            profile_data = json.loads(raw)
             profile_data["name"] = name
-            for profile in profile_data["profiles"]:
-                profile["name"] = name
-            raw = json.dumps(profile_data, indent=2, sort_keys=True)
-        return raw
+            profiles = profile_data["profiles"]
+            for profile in profiles:
+                old_name = profile.get("name")
+                multiple = len(profiles) > 1 and old_name
+                profile["name"] = f"{name}: {old_name}" if multiple else name
+        return profile_data
 
     @T.default("json_rewrites")
     def _default_json_rewrites(self) -> Dict[str, str]:
@@ -104,7 +312,7 @@ class ProfileJSON(IPyProfilerBase):
         path_escapes = {re.escape(f"{p}"): new for p, new in paths.items()}
 
         return {
-            r'"[^"]+?ipykernel_[\d]+.[\d]+\.py"': '"__main__"',
+            r"^.*?ipykernel_\d+.\d+\.py$": "__main__",
             r"ipython-input-\d+-\d+": "__main__",
             **path_escapes,
         }
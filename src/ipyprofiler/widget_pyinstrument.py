@@ -2,21 +2,60 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import os
 import re
-from contextlib import contextmanager
-from dataclasses import dataclass
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, NoReturn
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NoReturn, Sequence
 
 import ipywidgets as W
 import jinja2
 import traitlets as T
 
-from .constants import SPEEDSCOPE_SIMPLE_JSON, UTF8, AsyncMode, DOMClasses
+from .archive import (
+    append_manifest,
+    read_manifest,
+    read_profile,
+    replace_manifest,
+    summarize_profile,
+    with_codec_suffix,
+    write_profile,
+)
+from .benchmark import BenchmarkResult, describe_times
+from .calibrate import (
+    DEFAULT_INTERVALS,
+    IntervalCalibration,
+    choose_interval,
+    measure_intervals,
+)
+from .constants import (
+    AUTO_INTERVAL,
+    EXTRAS_KEY,
+    SPEEDSCOPE_SIMPLE_JSON,
+    ArchiveCodec,
+    AsyncMode,
+    Compression,
+    DOMClasses,
+)
+from .diff import diff_profiles
+from .merge import merge_documents, merge_profiles
+from .processes import combine_documents, profile_worker, read_spool
+from .sampler import RollingSampler
+from .stages import StageTimer
 from .widget_callgraph import Callgraph
 from .widget_flamegraph import Flamegraph
 from .widget_profile import ProfileJSON
+from .widget_summary import Summary
 
 if TYPE_CHECKING:
     from collections.abc import Generator
@@ -25,13 +64,28 @@ if TYPE_CHECKING:
     from pyinstrument.renderers import SpeedscopeRenderer
 
 
+def _describe_timings(doc: Dict[str, Any]) -> str:
+    """Summarize the unprofiled times of a benchmark document, if it is one."""
+    return describe_times(doc.get(EXTRAS_KEY, {}).get("timings", {}).get("times", []))
+
+
 @dataclass
 class HistoryItem:
-    """Lightweight history for files."""
+    """Lightweight history for files, with values loaded on demand."""
 
     name: str
-    value: str
     path: Path
+    size: int = 0
+    timestamp: float = 0.0
+    duration: float = 0.0
+    samples: int = 0
+    top_functions: List[str] = field(default_factory=list)
+    timings: str = ""
+
+    @property
+    def label(self) -> str:
+        """Describe the item in a history navigator."""
+        return f"{self.name} ({self.timings})" if self.timings else self.name
 
 
 @W.register
@@ -40,34 +94,133 @@ class Pyinstrument(W.Widget):
 
     flamegraph: Flamegraph = T.Instance(Flamegraph, help="a flamegraph visualizer")
     callgraph: Callgraph = T.Instance(Callgraph, help="a callgraph visualizer")
+    summary: Summary = T.Instance(Summary, help="a table of the hottest functions")
     _profile: ProfileJSON = T.Instance(ProfileJSON, help="a shared profile")
 
-    interval: float = T.Float(0.001, help="the sampling interval in seconds")
+    interval: float | str = T.Union(
+        [T.Float(), T.Enum([AUTO_INTERVAL])],
+        default_value=0.001,
+        help="the sampling interval in seconds, or 'auto' to use ``auto_interval``",
+    )
+    auto_interval: float = T.Float(
+        0.001,
+        read_only=True,
+        help="the interval chosen by the last ``calibrate``",
+    )
+    max_overhead: float = T.Float(
+        0.02,
+        min=0.0,
+        help="the most time ``calibrate`` may add to a run, as a fraction of it",
+    )
+    max_profile_bytes: int = T.Int(
+        16 * 1024 * 1024,
+        min=0,
+        help="the largest profile ``calibrate`` may produce, or 0 for no limit",
+    )
+    calibration: List[Dict[str, Any]] = T.List(
+        read_only=True,
+        help="the overhead and profile size of each interval in the last calibrate",
+    )
     async_mode: AsyncMode = T.UseEnum(AsyncMode, help="behavior with async code")
     name: str | None = T.Unicode("untitled", help="name to display", allow_none=True)
     output_folder: Path | None = T.Instance(Path, allow_none=True)
     output_template: str = T.Unicode("{{ now_ts }}-{{ name }}.json")
     filename: str | None = T.Unicode(allow_none=True)
+    archive_codec: ArchiveCodec = T.UseEnum(
+        ArchiveCodec,
+        default_value=ArchiveCodec.json,
+        help="the on-disk format of archived profiles",
+    )
+    compression: Compression = T.UseEnum(
+        Compression,
+        default_value=Compression.none,
+        help="codec for syncing profiles to the browser as binary buffers",
+    )
+    compression_level: int = T.Int(1, min=1, max=9, help="codec effort level")
     processor_options: Dict[str, Any] = T.Dict(
         help="additional options to pass to post-processors"
     )
     profiling: bool = T.Bool(default_value=False)
+    processes: bool = T.Bool(
+        default_value=False,
+        help="also profile worker processes started with ``worker_initializer``",
+    )
+    background: bool = T.Bool(
+        default_value=False,
+        help="post-process stopped profiles in a worker thread",
+    )
+    pending: bool = T.Bool(
+        default_value=False,
+        read_only=True,
+        help="whether a stopped profile is still being post-processed",
+    )
+
+    continuous: bool = T.Bool(
+        default_value=False,
+        help="keep sampling all threads, publishing the most recent window",
+    )
+    window: float = T.Float(
+        30.0, min=0.0, help="the seconds of samples to show when continuous"
+    )
+    refresh_interval: float = T.Float(
+        1.0, min=0.0, help="the seconds between publishing the window when continuous"
+    )
+    max_samples: int = T.Int(
+        100_000, min=1, help="the most stacks to keep in memory when continuous"
+    )
+    sampler_overhead: float = T.Float(
+        0.0,
+        read_only=True,
+        help="the fraction of time spent sampling and publishing when continuous",
+    )
+    timings: str = T.Unicode(
+        "",
+        read_only=True,
+        help="the min, median and max unprofiled time of the benchmark shown, if any",
+    )
+    stage_timings: Dict[str, Dict[str, float]] = T.Dict(
+        read_only=True,
+        help="the seconds, and bytes produced, of each stage of the last profile",
+    )
 
     _profiler: Profiler = T.Instance("pyinstrument.Profiler")
+    _samples: bool = T.Bool(
+        default_value=True,
+        help="whether ``interval`` can be calibrated, and workers profiled",
+    )
+    _sampler: RollingSampler | None = T.Instance(RollingSampler, allow_none=True)
+    _spool: Path | None = T.Instance(Path, allow_none=True)
     _flamegraph_renderer: SpeedscopeRenderer = T.Instance(
         "pyinstrument.renderers.SpeedscopeRenderer"
     )
+    max_history_items: int = T.Int(
+        8, min=0, help="the most archived profile values to keep in memory"
+    )
+    max_history_bytes: int = T.Int(
+        64 * 1024 * 1024,
+        min=0,
+        help="the most bytes of archived profile values to keep in memory",
+    )
+
     _history: tuple[HistoryItem, ...] = T.Tuple()
+    _history_values: Dict[Path, str] = T.Dict(
+        help="recently-used archived profile values, oldest first"
+    )
+    _history_lock: threading.Lock = T.Any(help="guards ``_history_values``")
+    _executor: ThreadPoolExecutor = T.Instance(ThreadPoolExecutor)
+    _future: Future | None = T.Instance(Future, allow_none=True)
+    _futures: List[Future] = T.List(help="post-processing not yet published, in order")
 
     def ui(self, **kwargs: Any) -> W.VBox:
         """Provide a tab-based UI."""
         tab = W.Tab(
-            children=[self.flamegraph, self.callgraph],
-            titles=["🔥 flame graph", "📞 call graph"],
+            children=[self.flamegraph, self.callgraph, self.summary],
+            titles=["🔥 flame graph", "📞 call graph", "📋 top functions"],
             layout={"flex": "1"},
         )
+        timings = W.Label()
         meta = W.HBox(
-            [self.history()],
+            [self.history(), timings],
             layout={"flex": "0", "min_height": "2.5em", "overflow": "hidden"},
         )
 
@@ -75,11 +228,14 @@ class Pyinstrument(W.Widget):
 
         box = W.VBox(**kwargs)
         box.add_class(DOMClasses.pyinstrument.value)
-        T.dlink(
-            (self, "_history"),
-            (meta.layout, "display"),
-            lambda h: "flex" if len(h) > 1 else "none",
-        )
+        T.dlink((self, "timings"), (timings, "value"))
+
+        def _on_change(*_change: T.Bunch) -> None:
+            shown = len(self._history) > 1 or self.timings
+            meta.layout.display = "flex" if shown else "none"
+
+        self.observe(_on_change, ["_history", "timings"])
+        _on_change()
         return box
 
     def history(self) -> W.Select:
@@ -89,7 +245,7 @@ class Pyinstrument(W.Widget):
         T.dlink(
             (self, "_history"),
             (dropdown, "options"),
-            lambda h: {hi.name: hi for hi in h},
+            lambda h: {hi.label: hi for hi in h},
         )
         T.dlink(
             (self, "_history"),
@@ -99,7 +255,7 @@ class Pyinstrument(W.Widget):
         T.dlink(
             (dropdown, "value"),
             (self._profile, "value"),
-            lambda hi: self._profile.value if hi is None else hi.value,
+            lambda hi: self._profile.value if hi is None else self.read_history(hi),
         )
 
         return dropdown
@@ -108,30 +264,45 @@ class Pyinstrument(W.Widget):
     def profile(  # noqa: PLR0913
         self,
         name: str | None = None,
-        interval: float | None = None,
+        interval: float | str | None = None,
         async_mode: AsyncMode | None = None,
         processor_options: Dict[str, Any] | None = None,
         mermaid_options: Dict[str, Any] | None = None,
         use_elk: bool | None = None,
         group_by_file: bool | None = None,
         filename: str | None = None,
+        processes: bool | None = None,
     ) -> Generator[None, Any, None]:
-        """Profile some Python code and update the speedscope display."""
+        """Profile some Python code and update the speedscope display.
+
+        With ``processes``, pass ``worker_initializer`` as the ``initializer`` of
+        process pools started in the block, and shut them down before it ends, to
+        show each worker as another profile. Workers are sampled by ``pyinstrument``,
+        so profilers which do not sample raise a ``TypeError``.
+        """
+        processes = processes if processes is not None else self.processes
+        if processes and not self._samples:
+            msg = f"{type(self).__name__} does not sample, so cannot profile processes"
+            raise TypeError(msg)
         self.interval = interval if interval is not None else self.interval
+        self.processes = processes
         self.async_mode = async_mode if interval is not None else self.async_mode
         self.name = name if name is not None else self.name
         self.filename = filename if filename else self.filename
-        self.callgraph.mermaid_options = (
-            mermaid_options
-            if mermaid_options is not None
-            else self.callgraph.mermaid_options
-        )
-        self.callgraph.use_elk = (
-            use_elk if use_elk is not None else self.callgraph.use_elk
-        )
-        self.callgraph.group_by_file = (
-            group_by_file if group_by_file is not None else self.callgraph.group_by_file
-        )
+        with self.callgraph.hold_trait_notifications():
+            self.callgraph.mermaid_options = (
+                mermaid_options
+                if mermaid_options is not None
+                else self.callgraph.mermaid_options
+            )
+            self.callgraph.use_elk = (
+                use_elk if use_elk is not None else self.callgraph.use_elk
+            )
+            self.callgraph.group_by_file = (
+                group_by_file
+                if group_by_file is not None
+                else self.callgraph.group_by_file
+            )
         self.processor_options = (
             processor_options
             if self.processor_options is None
@@ -145,49 +316,454 @@ class Pyinstrument(W.Widget):
         finally:
             self.profiling = False
 
+    @property
+    def sample_interval(self) -> float:
+        """Get the sampling interval, which is ``auto_interval`` if ``"auto"``."""
+        if self.interval == AUTO_INTERVAL:
+            return self.auto_interval
+        return self.interval
+
+    def calibrate(
+        self,
+        fn: Callable[[], Any],
+        intervals: Sequence[float] = DEFAULT_INTERVALS,
+        repeat: int = 3,
+    ) -> List[IntervalCalibration]:
+        """Measure the overhead, and profile size, of profiling ``fn`` per interval.
+
+        The smallest interval which adds at most ``max_overhead`` to the best
+        unprofiled time, and renders at most ``max_profile_bytes``, becomes
+        ``auto_interval``, as used when ``interval`` is ``"auto"``. The overhead
+        of each interval is in ``calibration``. Each run uses a new profiler, so
+        the current profile is kept, but none may be running.
+        """
+        if not self._samples:
+            msg = f"{type(self).__name__} does not sample, so has no interval"
+            raise TypeError(msg)
+        if self.profiling:
+            msg = "calibrate is not available while profiling"
+            raise RuntimeError(msg)
+        results = measure_intervals(
+            fn,
+            self._start_interval,
+            lambda profiler: profiler.stop(),
+            self._speedscope_json,
+            intervals=intervals,
+            repeat=repeat,
+        )
+        self.set_trait("calibration", [result.to_dict() for result in results])
+        self.set_trait(
+            "auto_interval",
+            choose_interval(results, self.max_overhead, self.max_profile_bytes),
+        )
+        return results
+
+    def _start_interval(self, interval: float) -> Profiler:
+        """Start a new profiler, which samples every ``interval`` seconds."""
+        profiler = self._make_profiler(interval)
+        profiler.start()
+        return profiler
+
+    def benchmark(
+        self,
+        fn: Callable[[], Any],
+        repeat: int = 10,
+        warmup: int = 1,
+        profile_repeat: int = 1,
+        name: str | None = None,
+    ) -> BenchmarkResult:
+        """Time repeated runs of ``fn`` after ``warmup``, publishing a merged profile.
+
+        The ``repeat`` timed runs are never profiled. Then ``profile_repeat`` more
+        runs, or none if ``0``, are profiled and timed apart, in ``profiled_times``.
+        These are merged into one profile of the mean time per stack, with all the
+        times in ``timings``, and archived as one profile. With an ``"auto"``
+        ``interval``, ``fn`` is first used to ``calibrate``, if that has not been
+        done yet. None may be running.
+        """
+        if self.profiling:
+            msg = "benchmark is not available while profiling"
+            raise RuntimeError(msg)
+        name = name if name is not None else self.name or "benchmark"
+        if self._samples and self.interval == AUTO_INTERVAL and not self.calibration:
+            self.calibrate(fn)
+        for _ in range(warmup):
+            fn()
+
+        result = BenchmarkResult(name=name, warmup=warmup)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            result.times.append(time.perf_counter() - start)
+
+        runs = []
+        for _ in range(profile_repeat):
+            self._profiler = self._default_profiler()
+            self._start_profiler()
+            start = time.perf_counter()
+            try:
+                fn()
+            finally:
+                result.profiled_times.append(time.perf_counter() - start)
+                self._stop_profiler()
+            runs.append(self._speedscope_json(self._profiler))
+            self._set_profile_traits(self._profile_traits(self._profiler))
+
+        if runs:
+            doc = merge_documents(runs, name=name)
+            doc[EXTRAS_KEY]["timings"] = result.to_dict()
+            doc = self._profile.rewrite_speedscope(doc, name)
+            new_json = json.dumps(doc)
+            if self.output_folder is not None:
+                item = self._write_archive(new_json, name=name, doc=doc)
+                self._remember_archive(item, new_json)
+            self._profile.value = new_json
+
+        return result
+
     @T.observe("profiling")
     def _on_profiling(self, *_: Any) -> NoReturn:
         """Handle a change to ``profiling``."""
-        if self._profiler.is_running:
-            self._profiler.stop()
+        self._stop_profiler()
 
         if self.profiling:
+            if self.processes:
+                self._spool = Path(tempfile.mkdtemp(prefix="ipyprofiler-"))
             self._profiler = self._default_profiler()
-            self._profiler.start()
+            self._start_profiler()
+            return
+
+        profiler = self._profiler
+        name, filename = self.name, self.filename
+        spool, self._spool = self._spool, None
+
+        if not self.background:
+            self._post_process(profiler, name, filename, spool)
+            return
+
+        loop = None
+        with suppress(RuntimeError):
+            loop = asyncio.get_running_loop()
+        self._future = self._executor.submit(
+            self._process, profiler, name, filename, spool
+        )
+        self._futures.append(self._future)
+        self.set_trait("pending", bool(self._futures))
+        if loop is not None:
+            self._future.add_done_callback(partial(self._on_processed, loop))
+
+    @T.observe("continuous")
+    def _on_continuous(self, *_: Any) -> None:
+        """Start or stop sampling continuously."""
+        if self.continuous:
+            loop = None
+            with suppress(RuntimeError):
+                loop = asyncio.get_running_loop()
+            self._sampler = RollingSampler(
+                interval=self.sample_interval,
+                window=self.window,
+                max_samples=self.max_samples,
+                refresh_interval=self.refresh_interval,
+                on_refresh=partial(self._on_refresh, loop),
+            )
+            self._sampler.start()
+        elif self._sampler is not None:
+            sampler = self._sampler
+            sampler.stop()
+            self._publish_window(sampler, self._window_json(sampler))
+            self._sampler = None
+
+    def _on_refresh(
+        self, loop: asyncio.AbstractEventLoop | None, sampler: RollingSampler
+    ) -> None:
+        """Build a window in the sampler thread, and publish it on the event loop.
+
+        Without a running event loop, it is published from the sampler thread.
+        """
+        new_json = self._window_json(sampler)
+        if loop is None:
+            self._publish_window(sampler, new_json)
+            return
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(self._publish_window, sampler, new_json)
+
+    def _window_json(self, sampler: RollingSampler) -> str:
+        """Render the most recent window of a continuous sampler."""
+        doc = sampler.window_document(name=self.name or "continuous")
+        return json.dumps(self._profile.rewrite_speedscope(doc))
+
+    def _publish_window(self, sampler: RollingSampler, new_json: str) -> None:
+        """Publish a window of the current continuous sampler, if it changed."""
+        if sampler is not self._sampler:
             return
+        self.set_trait("sampler_overhead", sampler.overhead)
+        if new_json != self._profile.value:
+            self._profile.value = new_json
 
-        self._speedscope_renderer = self._default_speedscope_renderer()
-        new_json = self._profiler.output(self._speedscope_renderer)
-        new_json = self._profile.rewrite_speedscope_json(new_json, name=self.name)
+    def _start_profiler(self) -> None:
+        """Start the current profiler."""
+        self._profiler.start()
 
+    def _stop_profiler(self) -> None:
+        """Stop the current profiler, if it is running."""
+        if self._profiler.is_running:
+            self._profiler.stop()
+
+    def _speedscope_json(self, profiler: Profiler) -> str:
+        """Render a stopped profiler as speedscope JSON."""
+        return profiler.output(self._default_speedscope_renderer())
+
+    def _profile_traits(self, _profiler: Profiler) -> Dict[str, Any]:
+        """Describe a stopped profiler as traits, set when its profile is published.
+
+        This may be called in a ``background`` worker thread, so changes nothing.
+        """
+        return {}
+
+    def _set_profile_traits(self, traits: Dict[str, Any]) -> None:
+        """Set the traits describing the profile being published."""
+        for name, value in traits.items():
+            self.set_trait(name, value)
+
+    def wait(self, timeout: float | None = None) -> str | None:
+        """Wait for any ``background`` post-processing, returning the new JSON.
+
+        Without a running event loop, finished profiles are only published here.
+        """
+        future = self._future
+        if future is None:
+            return None
+        new_json, *_ = future.result(timeout=timeout)
+        self._publish_processed()
+        return new_json
+
+    def close(self) -> None:
+        """Close the widget, and stop its worker without waiting for post-processing."""
+        self._executor.shutdown(wait=False)
+        super().close()
+
+    def _on_processed(self, loop: asyncio.AbstractEventLoop, _future: Future) -> None:
+        """Publish finished post-processing on the event loop of the main thread."""
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(self._publish_processed)
+
+    def _publish_processed(self) -> None:
+        """Publish finished post-processing, in the order it was started."""
+        try:
+            while self._futures and self._futures[0].done():
+                self._publish(*self._futures.pop(0).result())
+        finally:
+            self.set_trait("pending", bool(self._futures))
+
+    @property
+    def worker_initializer(self) -> partial[None]:
+        """Get an ``initializer`` for process pools, while profiling ``processes``."""
+        if self._spool is None:
+            msg = "worker_initializer is only available in profile(processes=True)"
+            raise RuntimeError(msg)
+        return partial(profile_worker, self._spool, self.sample_interval)
+
+    def _post_process(
+        self,
+        profiler: Profiler,
+        name: str | None,
+        filename: str | None,
+        spool: Path | None = None,
+    ) -> str:
+        """Render, rewrite, archive and publish a stopped profile.
+
+        Each stage is timed in ``stage_timings``, and logged at ``DEBUG`` level.
+        """
+        return self._publish(*self._process(profiler, name, filename, spool))
+
+    def _process(
+        self,
+        profiler: Profiler,
+        name: str | None,
+        filename: str | None,
+        spool: Path | None = None,
+    ) -> tuple[str, HistoryItem | None, StageTimer, Dict[str, Any]]:
+        """Render, rewrite and archive a stopped profile, without changing traits.
+
+        This is all the work done in a ``background`` worker thread.
+        """
+        timer = StageTimer(f"post-processing {name}")
+        with timer.stage("render") as stage:
+            new_json = self._speedscope_json(profiler)
+            stage["bytes"] = len(new_json)
+        traits = self._profile_traits(profiler)
+        if spool is not None:
+            with timer.stage("combine") as stage:
+                new_json = self._combine_spool(new_json, spool)
+                stage["bytes"] = len(new_json)
+        with timer.stage("rewrite") as stage:
+            doc = self._profile.rewrite_speedscope(json.loads(new_json), name=name)
+            new_json = json.dumps(doc)
+            stage["bytes"] = len(new_json)
+        item = None
         if self.output_folder is not None:
-            self.archive(new_json)
-        self._profile.value = new_json
-        self.callgraph.render()
+            with timer.stage("archive") as stage:
+                item = self._write_archive(new_json, name, filename, doc)
+                stage["bytes"] = item.size
+        return new_json, item, timer, traits
+
+    def _publish(
+        self,
+        new_json: str,
+        item: HistoryItem | None,
+        timer: StageTimer,
+        traits: Dict[str, Any],
+    ) -> str:
+        """Add a processed profile to the history, and show it."""
+        if item is not None:
+            self._remember_archive(item, new_json)
+        self._set_profile_traits(traits)
+        with timer.stage("publish") as stage:
+            self._profile.value = new_json
+            stage["bytes"] = self._profile.payload_bytes()
+
+        self.set_trait("stage_timings", timer.to_dict())
+        timer.log()
+        return new_json
+
+    def _combine_spool(self, new_json: str, spool: Path) -> str:
+        """Add the profiles of any workers to a profile, and remove the spool."""
+        try:
+            workers = read_spool(spool)
+        finally:
+            shutil.rmtree(spool, ignore_errors=True)
+        if not workers:
+            return new_json
+        docs = [(f"main {os.getpid()}", json.loads(new_json)), *workers]
+        return json.dumps(combine_documents(docs))
 
-    def archive(self, new_json: str) -> None:
-        """Write out the file."""
-        filename = self.filename
+    def archive(
+        self,
+        new_json: str,
+        name: str | None = None,
+        filename: str | None = None,
+    ) -> None:
+        """Write out the file.
+
+        Archiving the current profile reuses its parsed ``value``.
+        """
+        doc = self._profile.parsed() if new_json == self._profile.value else None
+        item = self._write_archive(new_json, name, filename, doc)
+        self._remember_archive(item, new_json)
+
+    def _write_archive(
+        self,
+        new_json: str,
+        name: str | None = None,
+        filename: str | None = None,
+        doc: Dict[str, Any] | None = None,
+    ) -> HistoryItem:
+        """Write out the file, and its manifest entry, without changing traits.
+
+        ``doc`` is the parsed ``new_json``, if already at hand. Archiving to the
+        same file again replaces its manifest entry.
+        """
+        name = name if name is not None else self.name
+        filename = filename or self.filename
+        now_ts = round(datetime.timestamp(datetime.now(tz=timezone.utc)), 2)
         if not filename:
             tmpl = jinja2.Template(self.output_template)
-            now_ts = round(datetime.timestamp(datetime.now(tz=timezone.utc)), 2)
-            filename = tmpl.render(now_ts=now_ts, name=self.name)
+            filename = tmpl.render(now_ts=now_ts, name=name)
         filename = re.sub(r"[^a-z_\d\.\-]+", "_", filename, flags=re.IGNORECASE)
+        filename = with_codec_suffix(filename, self.archive_codec)
         path = self.output_folder / filename
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(new_json, **UTF8)
-        self._history = (
-            *self._history,
-            HistoryItem(path=path, name=self.name, value=new_json),
+        replaced = path.exists()
+        write_profile(path, new_json, self.archive_codec)
+        doc = json.loads(new_json) if doc is None else doc
+        item = HistoryItem(
+            path=path,
+            name=name,
+            size=path.stat().st_size,
+            timestamp=now_ts,
+            timings=_describe_timings(doc),
+            **summarize_profile(doc),
+        )
+        record = {**asdict(item), "path": path.name}
+        if replaced:
+            replace_manifest(self.output_folder, record)
+        else:
+            append_manifest(self.output_folder, record)
+        return item
+
+    def _remember_archive(self, item: HistoryItem, new_json: str) -> None:
+        """Add an archived profile to the history, replacing any for the same file."""
+        self._remember_history_value(item, new_json)
+        history = [old for old in self._history if old.path != item.path]
+        self._history = (*history, item)
+
+    def load_history(self, output_folder: Path | None = None) -> None:
+        """Rebuild the history from the manifest of an archive folder.
+
+        Only the manifest is read, and entries with missing files are skipped, as
+        are any fields unknown to ``HistoryItem``.
+        """
+        folder = output_folder or self.output_folder
+        if folder is None:
+            msg = "load_history needs an output_folder"
+            raise ValueError(msg)
+        records = read_manifest(folder)
+        existing = {p.name for p in folder.iterdir()} if records else set()
+        known = {f.name for f in fields(HistoryItem)} - {"path"}
+        self._history = tuple(
+            HistoryItem(
+                path=folder / record["path"],
+                **{key: value for key, value in record.items() if key in known},
+            )
+            for record in records
+            if record["path"] in existing
         )
 
+    def read_history(self, item: HistoryItem) -> str:
+        """Get the value of an archived profile, from memory or disk."""
+        with self._history_lock:
+            value = self._history_values.pop(item.path, None)
+        if value is None:
+            value = read_profile(item.path)
+        self._remember_history_value(item, value)
+        return value
+
+    def diff(self, before: HistoryItem, after: HistoryItem) -> ProfileJSON:
+        """Compare two archived profiles, as regressions and improvements."""
+        return diff_profiles(
+            ProfileJSON(value=self.read_history(before), name=before.name),
+            ProfileJSON(value=self.read_history(after), name=after.name),
+        )
+
+    def merge(self, items: Sequence[HistoryItem], name: str = "merged") -> ProfileJSON:
+        """Merge archived runs of a workload, reading them in a process pool."""
+        return merge_profiles([item.path for item in items], name=name)
+
+    def _remember_history_value(self, item: HistoryItem, value: str) -> None:
+        """Keep a recently-used value, evicting the least-recently used.
+
+        Sizes are measured in characters, which for speedscope JSON are mostly bytes.
+        """
+        with self._history_lock:
+            values = self._history_values
+            values.pop(item.path, None)
+            values[item.path] = value
+            total = sum(map(len, values.values()))
+            while values and (
+                len(values) > self.max_history_items or total > self.max_history_bytes
+            ):
+                total -= len(values.pop(next(iter(values))))
+
     @T.default("_profiler")
     def _default_profiler(self) -> Profiler:
         """Provide a default profiler."""
+        return self._make_profiler(self.sample_interval)
+
+    def _make_profiler(self, interval: float) -> Profiler:
+        """Create a profiler which samples every ``interval`` seconds."""
         from pyinstrument import Profiler
 
         return Profiler(
-            interval=self.interval,
+            interval=interval,
             async_mode=self.async_mode,
         )
 
@@ -198,9 +774,28 @@ class Pyinstrument(W.Widget):
 
         return SpeedscopeRenderer(processor_options=self.processor_options)
 
+    @T.default("_history_lock")
+    def _default_history_lock(self) -> threading.Lock:
+        """Provide a lock for the recently-used archived profile values."""
+        return threading.Lock()
+
+    @T.default("_executor")
+    def _default_executor(self) -> ThreadPoolExecutor:
+        """Provide a single worker, so profiles are published in order."""
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="ipyprofiler")
+
     @T.default("_profile")
     def _default_profile(self) -> ProfileJSON:
-        return ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+        profile = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+        profile.observe(self._on_profile_value, "value")
+        T.link((self, "compression"), (profile, "compression"))
+        T.link((self, "compression_level"), (profile, "compression_level"))
+        return profile
+
+    def _on_profile_value(self, *_change: T.Bunch) -> None:
+        """Describe the times of the benchmark shown, if any."""
+        doc = self._profile.parsed() if self._profile.value else {}
+        self.set_trait("timings", _describe_timings(doc))
 
     @T.default("flamegraph")
     def _default_speedscope(self) -> Flamegraph:
@@ -212,6 +807,11 @@ class Pyinstrument(W.Widget):
         """Provide a default ``Callgraph``."""
         return Callgraph(profile=self._profile)
 
+    @T.default("summary")
+    def _default_summary(self) -> Summary:
+        """Provide a default ``Summary``."""
+        return Summary(profile=self._profile)
+
     @T.default("processor_options")
     def _default_processor_options(self) -> Dict[str, Any]:
         """Provide default profile postprocessor options."""
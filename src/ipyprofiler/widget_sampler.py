@@ -0,0 +1,44 @@
+"""Convenience wrapper widget for sampling all threads."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+import ipywidgets as W
+import traitlets as T
+
+from .sampler import StackSampler
+from .widget_pyinstrument import Pyinstrument
+
+
+@W.register
+class AllThreads(Pyinstrument):
+    """Display a profile of every Python thread, one per thread.
+
+    Use ``n``/``p``/``t`` in the flamegraph to switch threads, and ``-1`` as the
+    callgraph's ``profile_index`` to merge them. ``async_mode`` is ignored.
+    """
+
+    sample_count: int = T.Int(
+        0, read_only=True, help="the samples taken in the last profile"
+    )
+
+    _profiler: StackSampler = T.Instance(StackSampler)
+
+    def _speedscope_json(self, profiler: StackSampler) -> str:
+        """Convert the samples of a stopped sampler to speedscope JSON."""
+        return json.dumps(profiler.to_document())
+
+    def _profile_traits(self, profiler: StackSampler) -> Dict[str, Any]:
+        """Report the samples taken by a stopped sampler."""
+        return {"sample_count": profiler.sample_count}
+
+    @T.default("_profiler")
+    def _default_profiler(self) -> StackSampler:
+        """Provide a new sampler."""
+        return self._make_profiler(self.sample_interval)
+
+    def _make_profiler(self, interval: float) -> StackSampler:
+        """Create a sampler which samples every ``interval`` seconds."""
+        return StackSampler(interval=interval)
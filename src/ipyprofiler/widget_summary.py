@@ -0,0 +1,222 @@
+"""Show the hottest functions of a profile as a paged table."""
+
+from __future__ import annotations
+
+from html import escape
+from typing import Any, Dict, List, Tuple
+
+import ipywidgets as W
+import traitlets as T
+
+from .constants import SPEEDSCOPE_SIMPLE_JSON, DOMClasses, SummaryColumn
+from .widget_profile import ProfileJSON
+
+#: column headings, and how to format each value
+SUMMARY_COLUMNS = {
+    "name": ("function", str),
+    "file": ("file", str),
+    "self_time": ("self time", "{:.6g}".format),
+    "time": ("total time", "{:.6g}".format),
+    "calls": ("calls", "{:,}".format),
+    "fraction": ("% of run", "{:.1%}".format),
+}
+
+RENDER_ON_TRAITS = [
+    "profile_index",
+    "sort_by",
+    "ascending",
+    "filter",
+    "page",
+    "page_size",
+]
+
+
+@W.register
+class Summary(W.VBox):
+    """Display the functions of a profile by self time, total time or calls.
+
+    Sorting, filtering and paging happen in the kernel, so only one page of rows is
+    ever sent to the browser.
+    """
+
+    profile: ProfileJSON = T.Instance(ProfileJSON)
+    table: W.HTML = T.Instance(W.HTML)
+    controls: W.HBox = T.Instance(W.HBox)
+
+    profile_index: int = T.Int(
+        0, min=-1, help="the profile to show, or -1 to merge all profiles"
+    ).tag(sync=True)
+    sort_by: SummaryColumn = T.UseEnum(
+        SummaryColumn, default_value=SummaryColumn.self_time, help="the sort column"
+    )
+    ascending: bool = T.Bool(default_value=False, help="sort smallest first").tag(
+        sync=True
+    )
+    filter: str = T.Unicode(
+        "", help="only show functions with this text in their name or file"
+    ).tag(sync=True)
+    page: int = T.Int(0, min=0, help="the page of rows to show").tag(sync=True)
+    page_size: int = T.Int(50, min=1, help="the most rows to show").tag(sync=True)
+
+    row_count: int = T.Int(0, read_only=True, help="rows matching the filter")
+    page_count: int = T.Int(1, read_only=True, help="pages of matching rows")
+
+    _rows: List[Dict[str, Any]] = T.Any()
+    _rows_key: Tuple[Any, ...] = T.Tuple()
+    _rows_source: List[Dict[str, Any]] | None = T.Any()
+
+    def __init__(self, **kwargs: Any):
+        """Create a new summary widget."""
+        super().__init__(**kwargs)
+        self.children = self._default_children()
+        self.add_class(DOMClasses.summary.value)
+        self.render()
+
+    @T.observe(*RENDER_ON_TRAITS)
+    def _on_render_trait(self, change: T.Bunch) -> None:
+        """Render, returning to the first page if the rows change."""
+        if change.name != "page" and self.page:
+            self.page = 0
+            return
+        self.render()
+
+    @T.observe("profile")
+    def _on_profile_change(self, change: T.Bunch) -> None:
+        """Handle a change of profile."""
+        if isinstance(change.old, ProfileJSON):
+            change.old.unobserve(self._on_value, "value")
+        self.profile.observe(self._on_value, "value")
+        self._on_value()
+
+    def _on_value(self, *_change: T.Bunch) -> None:
+        """Show the first page of a new profile."""
+        if self.page:
+            self.page = 0
+        else:
+            self.render()
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Get the filtered and sorted rows, re-sorting only when options change."""
+        all_rows = self.profile.to_summary(self.profile_index)
+        key = (self.filter, self.sort_by, self.ascending)
+        if all_rows is self._rows_source and key == self._rows_key:
+            return self._rows
+
+        rows = all_rows
+        needle = self.filter.casefold()
+        if needle:
+            rows = [
+                row
+                for row in rows
+                if needle in row["name"].casefold()
+                or needle in str(row["file"] or "").casefold()
+            ]
+
+        column = self.sort_by.value
+        reverse = not self.ascending
+        if column in {"name", "file"}:
+            rows = sorted(
+                rows, key=lambda row: str(row[column] or "").casefold(), reverse=reverse
+            )
+        else:
+            rows = sorted(rows, key=lambda row: row[column], reverse=reverse)
+
+        self._rows, self._rows_key, self._rows_source = rows, key, all_rows
+        return rows
+
+    def render(self, *_change: T.Bunch) -> None:
+        """Update the table with the current page."""
+        rows = self.rows()
+        page_count = max(1, -(-len(rows) // self.page_size))
+        self.set_trait("row_count", len(rows))
+        self.set_trait("page_count", page_count)
+        page = min(self.page, page_count - 1)
+        start = page * self.page_size
+        self.table.value = self._html(rows[start : start + self.page_size])
+
+    def _html(self, rows: List[Dict[str, Any]]) -> str:
+        """Format rows as an HTML table."""
+        head = "".join(f"<th>{title}</th>" for title, _ in SUMMARY_COLUMNS.values())
+        body = []
+        for row in rows:
+            row_file = row["file"] or ""
+            if row_file and row["line"] is not None:
+                row_file = f"{row_file}:{row['line']}"
+            cells = {**row, "file": row_file}
+            body += [
+                "<tr>"
+                + "".join(
+                    f"<td>{escape(fmt(cells[key]))}</td>"
+                    for key, (_, fmt) in SUMMARY_COLUMNS.items()
+                )
+                + "</tr>"
+            ]
+        return (
+            f"""<table class="{DOMClasses.summary.value}-table">"""
+            f"""<thead><tr>{head}</tr></thead><tbody>{"".join(body)}</tbody>"""
+            "</table>"
+        )
+
+    def _status(self, *_change: T.Bunch) -> str:
+        """Describe the rows on the current page."""
+        if not self.row_count:
+            return "no functions"
+        start = min(self.page, self.page_count - 1) * self.page_size
+        end = min(start + self.page_size, self.row_count)
+        return f"{start + 1:,} to {end:,} of {self.row_count:,}"
+
+    @T.default("children")
+    def _default_children(self) -> List[W.Widget]:
+        """Provide the controls and table."""
+        return [self.controls, self.table]
+
+    @T.default("controls")
+    def _default_controls(self) -> W.HBox:
+        """Provide (and link) filter, sort and paging controls."""
+        filter_text = W.Text(placeholder="filter functions and files")
+        sort_by = W.Dropdown(
+            description="sort by",
+            options=[(e.name.replace("_", " "), e) for e in SummaryColumn],
+        )
+        ascending = W.ToggleButton(icon="sort-amount-asc", tooltip="smallest first")
+        previous = W.Button(icon="chevron-left", tooltip="previous page")
+        following = W.Button(icon="chevron-right", tooltip="next page")
+        status = W.Label()
+
+        for trait, widget in [
+            ("filter", filter_text),
+            ("sort_by", sort_by),
+            ("ascending", ascending),
+        ]:
+            T.link((self, trait), (widget, "value"))
+
+        def _page(step: int) -> None:
+            self.page = max(0, min(self.page + step, self.page_count - 1))
+
+        previous.on_click(lambda *_: _page(-1))
+        following.on_click(lambda *_: _page(1))
+
+        def _on_status(*_change: T.Bunch) -> None:
+            status.value = self._status()
+            previous.disabled = self.page <= 0
+            following.disabled = self.page >= self.page_count - 1
+
+        self.observe(_on_status, ["row_count", "page_count", "page", "page_size"])
+
+        return W.HBox([filter_text, sort_by, ascending, previous, status, following])
+
+    @T.default("table")
+    def _default_table(self) -> W.HTML:
+        """Provide a default table widget."""
+        return W.HTML()
+
+    @T.default("profile")
+    def _default_profile(self) -> ProfileJSON:
+        """Provide a default profile."""
+        profile = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+        profile.observe(self._on_value, "value")
+        return profile
+
+    @T.default("_rows")
+    def _default_rows(self) -> List[Dict[str, Any]]:
+        return []
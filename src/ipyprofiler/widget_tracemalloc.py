@@ -0,0 +1,47 @@
+"""Convenience wrapper widget for ``tracemalloc``."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+import ipywidgets as W
+import traitlets as T
+
+from .memory import MemoryProfiler
+from .widget_pyinstrument import Pyinstrument
+
+
+@W.register
+class Tracemalloc(Pyinstrument):
+    """Display the memory allocated, and not freed, while profiling, by line.
+
+    Profiles are weighted by ``bytes``. ``interval`` and ``async_mode`` are ignored.
+    """
+
+    nframes: int = T.Int(25, min=1, help="the most frames to keep per allocation")
+    peak_bytes: int = T.Int(
+        0, read_only=True, help="the peak traced memory of the last profile"
+    )
+
+    _profiler: MemoryProfiler = T.Instance(MemoryProfiler)
+    _samples: bool = T.Bool(
+        default_value=False, help="``tracemalloc`` records every allocation"
+    )
+
+    def _speedscope_json(self, profiler: MemoryProfiler) -> str:
+        """Convert the snapshots of a stopped profiler to speedscope JSON."""
+        return json.dumps(profiler.to_document())
+
+    def _profile_traits(self, profiler: MemoryProfiler) -> Dict[str, Any]:
+        """Report the peak traced memory of a stopped profiler."""
+        return {"peak_bytes": profiler.peak}
+
+    @T.default("_profiler")
+    def _default_profiler(self) -> MemoryProfiler:
+        """Provide a new memory profiler."""
+        return self._make_profiler(self.sample_interval)
+
+    def _make_profiler(self, _interval: float) -> MemoryProfiler:
+        """Create a memory profiler, which does not sample."""
+        return MemoryProfiler(nframes=self.nframes)
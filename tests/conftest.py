@@ -4,13 +4,14 @@ from __future__ import annotations
 
 import os
 import pprint
+import random
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import pytest
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Generator, Sequence
 
     import nbconvert
 
@@ -29,6 +30,67 @@ NOTEBOOKS = (
 )
 
 
+def fib(n: int) -> int:
+    """Naively calculate the nth Fibonacci number with recursion."""
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def synthetic_profile(
+    n_frames: int,
+    n_events: int = 0,
+    *,
+    sampled: bool = False,
+    seed: int = 0,
+    prefixes: Sequence[str] = ("",),
+) -> dict[str, Any]:
+    """Generate a speedscope profile of frames ``f{i}`` in files ``m0.py`` to ``m6.py``.
+
+    A ``sampled`` profile has one caller of every other frame, each weighted by its
+    index. Otherwise, ``n_events`` random, balanced events nest calls up to 40 deep,
+    each caller calling a few of the same callees. Files are below ``prefixes``, in
+    turn.
+    """
+    frames = [
+        {
+            "name": f"f{i}",
+            "file": f"{prefixes[i % len(prefixes)]}m{i % 7}.py",
+            "line": i,
+        }
+        for i in range(n_frames)
+    ]
+    if sampled:
+        profile: dict[str, Any] = {
+            "type": "sampled",
+            "samples": [[0, i] for i in range(1, n_frames)],
+            "weights": list(range(1, n_frames)),
+        }
+    else:
+        # seeded for reproducible fixture data, not for security
+        rand = random.Random(seed)  # noqa: S311
+        events: list[dict[str, Any]] = []
+        stack: list[int] = []
+        at = 0.0
+        while len(events) < n_events:
+            if stack and (len(stack) > 40 or rand.random() < 0.45):
+                at += 0.001
+                events += [{"type": "C", "frame": stack.pop(), "at": at}]
+            else:
+                parent = stack[-1] if stack else rand.randrange(5)
+                stack += [(parent * 7 + rand.randrange(3)) % n_frames]
+                events += [{"type": "O", "frame": stack[-1], "at": at}]
+        while stack:
+            events += [{"type": "C", "frame": stack.pop(), "at": at}]
+        profile = {"type": "evented", "endValue": at, "events": events}
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": "synthetic",
+        "shared": {"frames": frames},
+        "profiles": [
+            {"name": "synthetic", "unit": "seconds", "startValue": 0, **profile}
+        ],
+    }
+
+
 @pytest.fixture(params=[n.name for n in NOTEBOOKS])
 def a_notebook(request: pytest.FixtureRequest) -> Path:
     """Provide a notebook."""
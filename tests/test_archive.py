@@ -0,0 +1,44 @@
+"""Tests of (compressed) speedscope files."""
+
+from __future__ import annotations
+
+import json
+import tracemalloc
+from typing import TYPE_CHECKING, NoReturn
+
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize("codec", ["json", "gzip", "zstd"])
+def test_archive_read_streams(
+    tmp_path: Path, codec: str, monkeypatch: pytest.MonkeyPatch
+) -> NoReturn:
+    """Verify profiles are decoded in chunks, without a copy of the whole file."""
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+
+    from ipyprofiler import archive
+    from ipyprofiler.constants import ArchiveCodec
+
+    # a small odd chunk size splits the two-byte ``ü`` between chunks
+    monkeypatch.setattr(archive, "READ_CHUNK_BYTES", 4093)
+    frames = [
+        {"name": f"füñction_{i}", "file": f"mödule_{i}.py"} for i in range(20_000)
+    ]
+    text = json.dumps({"shared": {"frames": frames}}, ensure_ascii=False)
+    path = tmp_path / archive.with_codec_suffix("big.json", ArchiveCodec(codec))
+    archive.write_profile(path, text, ArchiveCodec(codec))
+
+    tracemalloc.start()
+    try:
+        value = archive.read_profile(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert value == text
+    # the decoded chunks, and their join: reading all the bytes first takes ~3x
+    assert peak < 2.5 * len(text)
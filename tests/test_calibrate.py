@@ -0,0 +1,85 @@
+"""Tests of interval calibration."""
+
+from __future__ import annotations
+
+from typing import NoReturn
+
+import pytest
+
+from .conftest import fib
+
+
+@pytest.mark.parametrize(
+    ("max_overhead", "max_size", "expect"),
+    [
+        (0.02, 0, 0.001),
+        (0.5, 0, 0.0001),
+        (0.5, 1000, 0.001),
+        (0.0, 0, 0.01),
+    ],
+)
+def test_choose_interval(max_overhead: float, max_size: int, expect: float) -> NoReturn:
+    """Verify the smallest interval within both limits is chosen."""
+    from ipyprofiler.calibrate import IntervalCalibration, choose_interval
+
+    calibrations = [
+        IntervalCalibration(interval=0.01, seconds=1.001, baseline=1.0, size=100),
+        IntervalCalibration(interval=0.001, seconds=1.01, baseline=1.0, size=1000),
+        IntervalCalibration(interval=0.0001, seconds=1.2, baseline=1.0, size=10000),
+    ]
+    assert choose_interval(calibrations, max_overhead, max_size) == expect
+    assert calibrations[0].to_dict()["overhead"] == pytest.approx(0.001)
+    assert IntervalCalibration(0.1, 0.5, 0.0, 1).overhead == 0
+
+
+def test_calibrate_auto() -> NoReturn:
+    """Verify ``auto`` uses the calibrated interval, calibrating benchmarks."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(interval="auto", max_overhead=1000.0)
+    assert ps.sample_interval == ps.auto_interval == 0.001
+
+    ps.calibrate(lambda: fib(15), intervals=[0.01, 0.0001], repeat=1)
+    assert [c["interval"] for c in ps.calibration] == [0.0001, 0.01]
+    assert ps.calibration[0]["size"] > 0
+    assert ps.auto_interval == 0.0001
+
+    ps.max_profile_bytes = 1
+    ps.calibrate(lambda: fib(15), intervals=[0.01, 0.0001], repeat=1)
+    assert ps.auto_interval == 0.01
+
+    with ps.profile():
+        fib(10)
+    assert ps._profiler.interval == 0.01
+
+    ps = Pyinstrument(interval="auto")
+    ps.benchmark(lambda: fib(10), repeat=1)
+    assert len(ps.calibration) == 7
+    assert ps.sample_interval == ps.auto_interval
+
+
+def test_calibrate_keeps_profile() -> NoReturn:
+    """Verify calibrating uses its own profilers, and never while profiling."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument()
+    profiler = ps._profiler
+    ps.calibrate(lambda: fib(10), intervals=[0.01], repeat=1)
+    assert ps._profiler is profiler
+    assert not profiler.is_running
+
+    with ps.profile(), pytest.raises(RuntimeError, match="while profiling"):
+        ps.calibrate(lambda: fib(10), intervals=[0.01], repeat=1)
+
+
+@pytest.mark.parametrize("widget", ["CProfile", "Tracemalloc"])
+def test_calibrate_not_sampled(widget: str) -> NoReturn:
+    """Verify profilers which do not sample cannot be calibrated, or need it."""
+    import ipyprofiler
+
+    ps = getattr(ipyprofiler, widget)(interval="auto")
+    with pytest.raises(TypeError, match="does not sample"):
+        ps.calibrate(lambda: fib(10), intervals=[0.01], repeat=1)
+
+    ps.benchmark(lambda: fib(10), repeat=1)
+    assert ps.calibration == []
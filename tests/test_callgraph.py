@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 from typing import TYPE_CHECKING, NoReturn
 
 if TYPE_CHECKING:
@@ -26,7 +28,7 @@ def test_callgraph_defaults(a_callgraph: Callgraph) -> NoReturn:
     assert cg.profile.value
     cg.profile = ProfileJSON(value="{}")
     cg.profile = ProfileJSON(value="""{"foo": "bar"}""")
-    assert len(cg.options.children) == 3
+    assert len(cg.options.children) == 4
 
 
 def test_callgraph_show_options(a_callgraph: Callgraph) -> NoReturn:
@@ -38,3 +40,118 @@ def test_callgraph_show_options(a_callgraph: Callgraph) -> NoReturn:
     assert cg.options.expanded
     cg.show_options = False
     assert not cg.options.expanded
+
+
+def test_callgraph_render_held(a_callgraph: Callgraph) -> NoReturn:
+    """Verify held option changes render once."""
+    from ipyprofiler.constants import MermaidDirection
+
+    cg = a_callgraph
+    count = cg.render_count
+    with cg.hold_trait_notifications():
+        cg.show_time = True
+        cg.direction = MermaidDirection.left_to_right
+        cg.first_edge = 1
+    assert cg.render_count == count + 1
+    assert cg.render_skip_count == 2
+
+
+def test_callgraph_render_debounced(a_callgraph: Callgraph) -> NoReturn:
+    """Verify rapid browser changes in an event loop render once."""
+    cg = a_callgraph
+    cg.render_delay = 0.01
+    count = cg.render_count
+
+    async def drag() -> None:
+        for i in range(5):
+            cg.set_state({"first_edge": i})
+        assert cg.render_count == count
+        await asyncio.sleep(0.1)
+
+    asyncio.run(drag())
+    assert cg.render_count == count + 1
+    assert cg.render_skip_count == 4
+
+
+def test_callgraph_render_slider_debounced(a_callgraph: Callgraph) -> NoReturn:
+    """Verify rapid drags of an option slider in an event loop render once."""
+    import ipywidgets as W
+
+    cg = a_callgraph
+    cg.render_delay = 0.05
+    count = cg.render_count
+    slider = next(
+        child
+        for group in cg.options.children
+        for child in group.children
+        if isinstance(child, W.IntSlider) and child.description == "first edge"
+    )
+
+    async def drag() -> None:
+        for i in range(5):
+            slider.set_state({"value": i})
+        assert cg.first_edge == 4
+        assert cg.render_count == count
+        await asyncio.sleep(0.2)
+
+    asyncio.run(drag())
+    assert cg.render_count == count + 1
+    assert cg.render_skip_count == 4
+
+
+def test_callgraph_render_python_immediate(a_callgraph: Callgraph) -> NoReturn:
+    """Verify option changes from python render at once, even in an event loop."""
+    cg = a_callgraph
+    cg.render_delay = 0.01
+    count = cg.render_count
+
+    async def change() -> None:
+        cg.show_time = True
+        assert cg.render_count == count + 1
+        with cg.hold_trait_notifications():
+            cg.first_edge = 1
+            cg.show_time = False
+        assert cg.render_count == count + 2
+        mermaid = cg.output.outputs[0]["data"]["text/vnd.mermaid"]
+        assert mermaid == cg._mermaid()
+
+    asyncio.run(change())
+
+
+def test_callgraph_profile_index() -> NoReturn:
+    """Verify ``profile_index`` is limited to the profiles of the current value."""
+    import traitlets as T
+
+    from ipyprofiler import Callgraph, ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+
+    two_profiles = json.loads(SPEEDSCOPE_SIMPLE_JSON)
+    two_profiles["profiles"] *= 2
+
+    cg = Callgraph(profile=ProfileJSON(value=json.dumps(two_profiles)))
+    slider = cg.options.children[1].children[1]
+    assert cg.profile_count == 2
+    assert slider.max == 1
+    with pytest.raises(T.TraitError, match="out of range"):
+        cg.profile_index = 2
+    cg.profile_index = 1
+    count = cg.render_count
+    cg.profile.value = SPEEDSCOPE_SIMPLE_JSON
+    assert cg.render_count == count + 1
+    assert cg.profile_index == 0
+    assert slider.max == 0
+
+
+def test_callgraph_profile_index_init() -> NoReturn:
+    """Verify ``profile_index`` may be given with a profile of enough profiles."""
+    from ipyprofiler import Callgraph, ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+
+    three_profiles = json.loads(SPEEDSCOPE_SIMPLE_JSON)
+    three_profiles["profiles"] *= 3
+
+    cg = Callgraph(
+        profile=ProfileJSON(value=json.dumps(three_profiles)), profile_index=2
+    )
+    assert cg.profile_count == 3
+    assert cg.profile_index == 2
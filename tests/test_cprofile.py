@@ -0,0 +1,87 @@
+"""Tests of ``CProfile``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, NoReturn
+
+import pytest
+
+from .conftest import fib
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def work() -> int:
+    """Do some recursive and builtin work."""
+    return fib(12) + sorted(range(1000), key=lambda x: -x)[0]
+
+
+def test_cprofile_document() -> NoReturn:
+    """Verify a ``pstats`` table keeps its total time and exact call counts."""
+    import cProfile
+
+    from ipyprofiler.cprofile import pstats_to_document
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    work()
+    profiler.disable()
+    profiler.create_stats()
+
+    doc = pstats_to_document(profiler.stats)
+    (profile,) = doc["profiles"]
+    assert sum(profile["weights"]) == pytest.approx(profile["endValue"])
+    names = [f["name"] for f in doc["shared"]["frames"]]
+    call_counts = doc["ipyprofiler"]["call_counts"]
+    assert call_counts[names.index("fib")] == 465
+    assert call_counts[names.index("<lambda>")] == 1000
+    assert "call_counts" not in doc
+    fib_stacks = [s for s in profile["samples"] if s[-1] == names.index("fib")]
+    assert fib_stacks
+    assert all(s[-2] == names.index("work") for s in fib_stacks)
+
+
+def test_cprofile_max_stacks() -> NoReturn:
+    """Verify large tables are bounded, without losing time."""
+    from ipyprofiler.cprofile import pstats_to_document
+
+    n = 2000
+    keys = [("m.py", i, f"f{i}") for i in range(n)]
+    # a chain of callers, each with two callees
+    stats = {
+        key: (
+            1,
+            1,
+            1.0,
+            float(n - i),
+            {keys[(i - 1) // 2]: (1, 1, 1.0, float(n - i))} if i else {},
+        )
+        for i, key in enumerate(keys)
+    }
+    doc = pstats_to_document(stats, max_stacks=100)
+    (profile,) = doc["profiles"]
+    assert len(profile["samples"]) < 400
+    assert sum(profile["weights"]) == pytest.approx(n)
+
+
+def test_cprofile_widget(tmp_path: Path) -> NoReturn:
+    """Verify the widget archives a profile with call counts in its summary."""
+    from ipyprofiler import CProfile
+
+    cp = CProfile(output_folder=tmp_path)
+
+    with cp.profile(name="fib"):
+        work()
+
+    doc = json.loads(cp._profile.value)
+    assert doc["name"] == "fib"
+    assert "disable" not in cp._profile.value
+    assert len(cp._history) == 1
+    rows = {r["name"]: r for r in cp._profile.to_summary()}
+    assert rows["fib"]["calls"] == 465
+    assert "n-" in cp.callgraph._mermaid()
+    traits = cp.traits()
+    for name in ["interval", "async_mode", "processor_options"]:
+        assert traits[name].help.startswith("ignored")
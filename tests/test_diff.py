@@ -0,0 +1,37 @@
+"""Tests of profile diffs."""
+
+from __future__ import annotations
+
+import json
+from typing import NoReturn
+
+
+def test_diff_simple() -> NoReturn:
+    """Verify per-stack changes are split into regressions and improvements."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+    from ipyprofiler.diff import diff_profiles
+
+    before = json.loads(SPEEDSCOPE_SIMPLE_JSON)
+    after = json.loads(SPEEDSCOPE_SIMPLE_JSON)
+    # ``d`` closes later, the second ``c`` opens later
+    after["profiles"][0]["events"][5]["at"] = 7
+    after["profiles"][0]["events"][6]["at"] = 8
+
+    diff = diff_profiles(
+        ProfileJSON(value=json.dumps(before), name="before"),
+        ProfileJSON(value=json.dumps(after), name="after"),
+    )
+    assert diff.name == "before vs after"
+    doc = diff.parsed()
+    names = [f["name"] for f in doc["shared"]["frames"]]
+    regressions, improvements = doc["profiles"]
+
+    def _stacks(profile: dict) -> dict:
+        return {
+            "/".join(names[i] for i in stack): weight
+            for stack, weight in zip(profile["samples"], profile["weights"])
+        }
+
+    assert _stacks(regressions) == {"a/b/d": 1, "a/b": 1}
+    assert _stacks(improvements) == {"a/b/c": 2}
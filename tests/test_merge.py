@@ -0,0 +1,34 @@
+"""Tests of merged profiles."""
+
+from __future__ import annotations
+
+import json
+from typing import NoReturn
+
+import pytest
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_merge_simple(processes: int) -> NoReturn:
+    """Verify repeated runs are merged into frame statistics."""
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+    from ipyprofiler.merge import MIN_POOL_INPUTS, merge_profiles
+
+    slow = json.loads(SPEEDSCOPE_SIMPLE_JSON)
+    # ``d`` takes 5 more
+    for event in slow["profiles"][0]["events"][5:]:
+        event["at"] += 5
+    runs = [SPEEDSCOPE_SIMPLE_JSON] * (MIN_POOL_INPUTS - 1) + [json.dumps(slow)]
+
+    merged = merge_profiles(runs, name="fast and slow", processes=processes)
+    doc = merged.parsed()
+    assert merged.name == "fast and slow"
+    assert len(doc["shared"]["frames"]) == 4
+    (profile,) = doc["profiles"]
+    assert len(profile["samples"]) == 4
+    assert profile["endValue"] == pytest.approx(14 + 5 / MIN_POOL_INPUTS)
+
+    d_stats = doc["ipyprofiler"]["frame_stats"][3]
+    assert d_stats["self_time"]["median"] == 4
+    assert d_stats["self_time"]["mean"] == pytest.approx(4 + 5 / MIN_POOL_INPUTS)
+    assert 4 < d_stats["self_time"]["p95"] < 9
@@ -0,0 +1,74 @@
+"""Tests of profiling worker processes."""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import NoReturn
+
+import pytest
+
+from .conftest import fib
+
+START_METHODS = multiprocessing.get_all_start_methods()
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_processes(start_method: str) -> NoReturn:
+    """Verify workers are shown as profiles, with frames shared with the parent."""
+    if start_method not in START_METHODS:
+        pytest.skip(f"needs the {start_method} start method")
+
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument()
+    with pytest.raises(RuntimeError, match="processes=True"):
+        ps.worker_initializer  # noqa: B018
+
+    with ps.profile(name="pool", processes=True):
+        spool = ps._spool
+        with ProcessPoolExecutor(
+            2,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=ps.worker_initializer,
+        ) as pool:
+            results = list(pool.map(fib, [18] * 4))
+        fib(18)
+
+    assert results == [2584] * 4
+    assert not spool.exists()
+    doc = json.loads(ps._profile.value)
+    names = [p["name"] for p in doc["profiles"]]
+    assert names[0].startswith("pool: main")
+    assert sum(name.startswith("pool: worker") for name in names) == 2
+    frames = [f["name"] for f in doc["shared"]["frames"]]
+    assert frames.count("fib") == 1
+
+
+@pytest.mark.parametrize("widget", ["CProfile", "Tracemalloc"])
+def test_processes_not_sampled(widget: str) -> NoReturn:
+    """Verify profilers which do not sample cannot combine sampled workers."""
+    import ipyprofiler
+
+    ps = getattr(ipyprofiler, widget)()
+    with pytest.raises(TypeError, match="does not sample"), ps.profile(processes=True):
+        pass
+    assert not ps.processes
+    assert not ps.profiling
+
+
+def test_combine_documents() -> NoReturn:
+    """Verify frames are aligned across documents."""
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+    from ipyprofiler.processes import combine_documents
+
+    simple = json.loads(SPEEDSCOPE_SIMPLE_JSON)
+    reversed_frames = {
+        "shared": {"frames": [{"name": "b"}, {"name": "a"}]},
+        "profiles": [{"type": "sampled", "samples": [[1, 0]], "weights": [1]}],
+    }
+    doc = combine_documents([("one", simple), ("two", reversed_frames)])
+    assert len(doc["shared"]["frames"]) == 4
+    assert [p["name"] for p in doc["profiles"]] == ["one", "two"]
+    assert doc["profiles"][1]["samples"] == [[0, 1]]
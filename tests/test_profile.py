@@ -0,0 +1,219 @@
+"""Tests of ``ProfileJSON``."""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, NoReturn
+
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "deflate"])
+def test_profile_compression(compression: str) -> NoReturn:
+    """Verify ``value`` round-trips through (compressed) widget state."""
+    from ipywidgets.widgets.widget import _remove_buffers
+
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+
+    pj = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON, compression=compression)
+    state = pj.get_state(key="value")
+    _, _, buffers = _remove_buffers(state)
+
+    if compression == "none":
+        assert state["value"] == SPEEDSCOPE_SIMPLE_JSON
+        assert not buffers
+        assert pj.sent_bytes == len(SPEEDSCOPE_SIMPLE_JSON)
+    else:
+        assert state["value"]["compression"] == compression
+        assert len(buffers) == 1
+        assert len(buffers[0]) < len(SPEEDSCOPE_SIMPLE_JSON)
+        assert pj.sent_bytes == len(buffers[0])
+
+    pj2 = ProfileJSON()
+    pj2.set_state(state)
+    assert pj2.value == SPEEDSCOPE_SIMPLE_JSON
+
+
+def test_profile_cache() -> NoReturn:
+    """Verify derived data is reused until ``value`` or ``json_rewrites`` change."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+
+    pj = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+    cg = pj.to_callgraph()
+    assert pj.to_callgraph() is cg
+    assert pj.parsed() is pj.parsed()
+
+    pruned = pj.to_callgraph(max_nodes=2)
+    assert pj.to_callgraph(max_nodes=2) is pruned
+    pj.to_callgraph(max_nodes=3)
+    assert pj.to_callgraph(max_nodes=2) is not pruned
+    # with ``numpy``, the callgraph is built from a cached table
+    assert {*pj._cache} - {"table-0"} == {"parsed", "callgraph-0", "callgraph-0-pruned"}
+
+    pj.json_rewrites = {}
+    assert pj.to_callgraph() is not cg
+    cg = pj.to_callgraph()
+
+    pj.value = SPEEDSCOPE_SIMPLE_JSON.replace('"a"', '"z"')
+    new_cg = pj.to_callgraph()
+    assert new_cg is not cg
+    assert new_cg["nodes"][0]["name"] == "z"
+
+
+def test_profile_callgraph_aggregated() -> NoReturn:
+    """Verify repeated calls are merged into a single edge."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+
+    cg = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON).to_callgraph()
+    edges = {(e["source"], e["target"]): e for e in cg["edges"]}
+    assert [*edges] == [("n-0", "n-1"), ("n-1", "n-2"), ("n-1", "n-3")]
+    assert edges["n-1", "n-2"]["calls"] == 2
+    assert edges["n-1", "n-2"]["time"] == 5
+    assert edges["n-0", "n-1"]["time"] == 14
+    assert edges["n-0", "n-1"]["self_time"] == 5
+    nodes = {n["id"]: n for n in cg["nodes"]}
+    assert nodes["n-0"]["time"] == 14
+    assert nodes["n-0"]["self_time"] == 0
+
+
+SAMPLED_JSON = """{
+  "shared": {"frames": [{"name": "a"}, {"name": "b"}, {"name": "c"}]},
+  "profiles": [
+    {"type": "sampled", "samples": [[0, 1], [0, 1, 2], [0, 1]], "weights": [1, 2, 3]},
+    {"type": "sampled", "samples": [[0, 2]], "weights": [4]}
+  ]
+}"""
+
+
+@pytest.mark.parametrize(
+    ("profile_index", "expect_edges"),
+    [
+        (0, {("n-0", "n-1"): (3, 6, 4), ("n-1", "n-2"): (1, 2, 2)}),
+        (1, {("n-0", "n-2"): (1, 4, 4)}),
+        (
+            -1,
+            {
+                ("n-0", "n-1"): (3, 6, 4),
+                ("n-1", "n-2"): (1, 2, 2),
+                ("n-0", "n-2"): (1, 4, 4),
+            },
+        ),
+        (2, {}),
+    ],
+)
+def test_profile_callgraph_sampled(
+    profile_index: int, expect_edges: dict[tuple[str, str], tuple[int, int, int]]
+) -> NoReturn:
+    """Verify sampled profiles can be selected or merged."""
+    from ipyprofiler import ProfileJSON
+
+    cg = ProfileJSON(value=SAMPLED_JSON).to_callgraph(profile_index)
+    edges = {
+        (e["source"], e["target"]): (e["calls"], e["time"], e["self_time"])
+        for e in cg["edges"]
+    }
+    assert edges == expect_edges
+
+
+@pytest.mark.parametrize(
+    ("prune_kwargs", "expect_nodes", "expect_other"),
+    [
+        ({}, ["a", "b", "c", "d"], None),
+        ({"max_nodes": 3}, ["a", "b", "c", "(other)"], (1, 4)),
+        ({"max_depth": 1}, ["a", "b", "(other)"], (3, 9)),
+        ({"min_time_fraction": 0.5}, ["a", "b", "(other)"], (3, 9)),
+    ],
+)
+def test_profile_callgraph_pruned(
+    prune_kwargs: dict[str, Any],
+    expect_nodes: list[str],
+    expect_other: tuple[int, float] | None,
+) -> NoReturn:
+    """Verify pruned nodes are folded into ``(other)``."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+
+    pj = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+    cg = pj.to_callgraph(**prune_kwargs)
+    assert pj.to_callgraph(**prune_kwargs) is cg
+    assert [n["name"] for n in cg["nodes"]] == expect_nodes
+    others = [e for e in cg["edges"] if e["target"] == "n-1-other"]
+    if expect_other is None:
+        assert not others
+    else:
+        assert [(e["calls"], e["time"]) for e in others] == [expect_other]
+    edge_ids = [e["id"] for e in cg["edges"]]
+    assert edge_ids == [f"e-{i}" for i in range(len(edge_ids))]
+
+
+def test_profile_rewrite(tmp_path: Path) -> NoReturn:
+    """Verify rewrites only apply to frame names and files."""
+    import json
+
+    from ipyprofiler import ProfileJSON
+
+    kernel_file = str(tmp_path / "ipykernel_123/456.py")
+    raw = json.dumps(
+        {
+            "shared": {
+                "frames": [
+                    {"name": "<module>", "file": kernel_file},
+                    {"name": "foo_bar", "file": "/opt/lib/foo.py", "line": 1},
+                ]
+            },
+            "profiles": [{"name": "/opt/lib", "type": "evented", "events": []}],
+        }
+    )
+    pj = ProfileJSON(
+        json_rewrites={
+            r"^.*?ipykernel_\d+.\d+\.py$": "__main__",
+            r"/opt/lib": "",
+            r"foo_(\w+)": r"\1_foo",
+        }
+    )
+    rewritten = json.loads(pj.rewrite_speedscope_json(raw, name="renamed"))
+    frames = rewritten["shared"]["frames"]
+    assert frames[0] == {"name": "<module>", "file": "__main__"}
+    assert frames[1] == {"name": "bar_foo", "file": "/foo.py", "line": 1}
+    assert rewritten["name"] == "renamed"
+    assert rewritten["profiles"][0]["name"] == "renamed"
+    assert "\n" not in pj.rewrite_speedscope_json(raw)
+
+
+@pytest.mark.parametrize(
+    ("rewrites", "text", "expect"),
+    [
+        (
+            {r"foo_(\w+)(?=\.py)": r"\1_foo", r"baz": "qux"},
+            "foo_bar.py foo_baz",
+            "bar_foo.py foo_qux",
+        ),
+        (
+            {r"(?<=/)lib/(\w+)$": r"\1", r"^/opt": "~"},
+            "/opt/lib/foo",
+            "~/foo",
+        ),
+        ({r"(?i)FOO": "bar", r"o": "0"}, "Foo foo", "bar bar"),
+        ({r"o": "0", r"(?i)FOO": "bar"}, "Foo foo", "F00 f00"),
+        ({r"(a)\1": "b", r"(c)": r"<\1>"}, "aac", "b<c>"),
+        ({r"(?P<x>a)": "b", r"(?P<x>c)": "d"}, "ac", "bd"),
+    ],
+)
+def test_profile_rewrite_patterns(
+    rewrites: dict[str, str], text: str, expect: str
+) -> NoReturn:
+    """Verify rewrites which can not be simply combined keep their meaning."""
+    from ipyprofiler.widget_profile import _compile_rewrites
+
+    rewrite = _compile_rewrites(tuple(rewrites.items()))
+    assert rewrite(text) == expect
+    expected = text
+    for pattern, replacement in rewrites.items():
+        expected = re.sub(pattern, replacement, expected)
+    assert expected == expect
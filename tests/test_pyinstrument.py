@@ -2,20 +2,20 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import re
+import threading
 from typing import TYPE_CHECKING, Any, NoReturn
 
 import pytest
 
+from .conftest import fib
+
 if TYPE_CHECKING:
     from pathlib import Path
 
 
-def fib(n: int) -> int:
-    """Nnaively calculate the nth Fibonacci number with recursion."""
-    return n if n < 2 else fib(n - 1) + fib(n - 2)
-
-
 @pytest.mark.parametrize(
     ("init_kwargs", "profile_kwargs", "expect"),
     [
@@ -63,7 +63,7 @@ def test_pyinstrument_callgraph(
     ui = ps.ui()
     assert len(ui.children) == 2
     tabs, bar = ui.children
-    assert len(tabs.children) == 2
+    assert len(tabs.children) == 3
 
     old_mmd = ps.callgraph._mermaid()
     old_profile = ps.callgraph.profile.value
@@ -90,16 +90,17 @@ def test_pyinstrument_history(tmp_path: Path) -> NoReturn:
     ps = Pyinstrument(output_folder=output_folder)
     ui = ps.ui()
     (tabs, meta) = ui.children
-    (history,) = meta.children
+    (history, timings) = meta.children
     assert not output_folder.exists()
     assert meta.layout.display == "none"
+    assert not timings.value
 
     with ps.profile(name="foo"):
         fib(10)
 
     assert meta.layout.display == "none"
     assert len(ps._history) == 1
-    assert_files(output_folder, 1)
+    assert_files(output_folder, 1, "*.json")
 
     old_profile = ps._profile.value
 
@@ -109,7 +110,7 @@ def test_pyinstrument_history(tmp_path: Path) -> NoReturn:
     assert ps._profile.value != old_profile
     assert meta.layout.display == "flex"
     assert len(ps._history) == 2
-    assert_files(output_folder, 2)
+    assert_files(output_folder, 2, "*.json")
 
 
 def assert_files(path: Path, count: int, glob: str = "*") -> bool:
@@ -119,3 +120,299 @@ def assert_files(path: Path, count: int, glob: str = "*") -> bool:
         len(files) == count
     ), f"expected {count} {path}/{glob} files, not {len(files)}"
     return True
+
+
+def test_pyinstrument_background(tmp_path: Path) -> NoReturn:
+    """Verify post-processing in a worker thread."""
+    from ipyprofiler import Pyinstrument
+
+    output_folder = tmp_path / "_pyinstrument"
+    ps = Pyinstrument(output_folder=output_folder, background=True)
+    assert ps.wait() is None
+    old_profile = ps._profile.value
+
+    with ps.profile(name="foo"):
+        fib(10)
+
+    new_profile = ps.wait(timeout=10)
+    assert not ps.pending
+    assert new_profile != old_profile
+    assert ps._profile.value == new_profile
+    assert '"name": "foo"' in new_profile
+    assert len(ps._history) == 1
+    assert_files(output_folder, 1, "*.json")
+
+    ps.close()
+    for thread in ps._executor._threads:
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+    with pytest.raises(RuntimeError, match="shutdown"):
+        ps._executor.submit(fib, 1)
+
+
+def test_pyinstrument_background_main_thread(tmp_path: Path) -> NoReturn:
+    """Verify background post-processing is published on the event loop thread."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path, background=True)
+    threads = []
+    ps.observe(lambda _: threads.append(threading.get_ident()), "_history")
+    ps._profile.observe(lambda _: threads.append(threading.get_ident()), "value")
+
+    async def run() -> None:
+        for name in ["foo", "bar"]:
+            with ps.profile(name=name):
+                fib(10)
+        assert ps.pending
+        for _ in range(1000):
+            if not ps.pending:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert not ps.pending
+    assert [item.name for item in ps._history] == ["foo", "bar"]
+    assert threads
+    assert set(threads) == {threading.get_ident()}
+
+
+def test_pyinstrument_history_lazy(tmp_path: Path) -> NoReturn:
+    """Verify archived values are evicted from memory, and reloaded from disk."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path, max_history_items=1)
+    history = ps.history()
+
+    for name in ["foo", "bar"]:
+        with ps.profile(name=name, filename=f"{name}.json"):
+            fib(10)
+
+    foo, bar = ps._history
+    assert [*ps._history_values] == [bar.path]
+    assert foo.size == foo.path.stat().st_size
+
+    history.value = foo
+    assert '"name": "foo"' in ps._profile.value
+    assert [*ps._history_values] == [foo.path]
+
+    ps.max_history_bytes = 0
+    history.value = bar
+    assert '"name": "bar"' in ps._profile.value
+    assert not ps._history_values
+
+
+@pytest.mark.parametrize(
+    ("codec", "suffix"),
+    [("json", ".json"), ("gzip", ".json.gz"), ("zstd", ".json.zst")],
+)
+def test_pyinstrument_archive_codec(
+    tmp_path: Path, codec: str, suffix: str
+) -> NoReturn:
+    """Verify archives can be compressed, and read back."""
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+
+    from ipyprofiler import ProfileJSON, Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path, archive_codec=codec, max_history_items=0)
+
+    with ps.profile(name="foo"):
+        fib(10)
+
+    (item,) = ps._history
+    assert item.path.name.endswith(suffix)
+    assert_files(tmp_path, 1, f"*{suffix}")
+    value = ps.read_history(item)
+    assert value == ps._profile.value
+    assert ProfileJSON.from_path(item.path).value == value
+
+
+def test_pyinstrument_stage_timings(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> NoReturn:
+    """Verify each stage of post-processing and rendering is timed, and logged."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path, archive_codec="gzip")
+
+    with caplog.at_level(logging.DEBUG, logger="ipyprofiler.stages"):
+        with ps.profile(name="foo"):
+            fib(10)
+        ps.callgraph.render()
+
+    stages = ps.stage_timings
+    assert [*stages] == ["render", "rewrite", "archive", "publish", "total"]
+    assert stages["rewrite"]["bytes"] == len(ps._profile.value)
+    assert 0 < stages["archive"]["bytes"] < stages["rewrite"]["bytes"]
+    assert stages["publish"]["bytes"] == len(ps._profile.value)
+    assert stages["total"]["seconds"] >= stages["render"]["seconds"] > 0
+    assert [*ps.callgraph.render_timings] == [
+        "callgraph",
+        "template",
+        "output",
+        "total",
+    ]
+    assert "post-processing foo: render" in caplog.text
+    assert "rendering callgraph: callgraph" in caplog.text
+
+
+def test_pyinstrument_publish_bytes(tmp_path: Path) -> NoReturn:
+    """Verify the publish stage measures the compressed value, even if unchanged."""
+    from ipyprofiler import Pyinstrument
+    from ipyprofiler.stages import StageTimer
+
+    ps = Pyinstrument(output_folder=tmp_path, compression="gzip")
+    assert ps._profile.compression.value == "gzip"
+    with ps.profile(name="foo"):
+        fib(10)
+    value = ps._profile.value
+    first = ps.stage_timings["publish"]["bytes"]
+
+    timer = StageTimer("again")
+    ps._publish(value, None, timer, {})
+
+    assert ps._profile.value == value
+    assert 0 < first < len(value)
+
+    ps.compression_level = 9
+    assert ps._profile.compression_level == 9
+    assert timer.stages["publish"]["bytes"] == first
+
+
+def test_pyinstrument_load_history(tmp_path: Path) -> NoReturn:
+    """Verify history can be rebuilt from the manifest."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path)
+    for name in ["foo", "bar", "baz"]:
+        with ps.profile(name=name, filename=f"{name}.json", interval=0.0001):
+            fib(15)
+    (tmp_path / "baz.json").unlink()
+
+    ps2 = Pyinstrument(output_folder=tmp_path)
+    ps2.load_history()
+    assert [hi.name for hi in ps2._history] == ["foo", "bar"]
+    foo = ps2._history[0]
+    assert foo.samples > 0
+    assert foo.top_functions
+    assert foo == ps._history[0]
+
+
+def test_pyinstrument_load_history_checks(tmp_path: Path) -> NoReturn:
+    """Verify history needs a folder, and ignores unknown manifest fields."""
+    import json
+
+    from ipyprofiler import Pyinstrument
+    from ipyprofiler.archive import MANIFEST_NAME
+
+    with pytest.raises(ValueError, match="output_folder"):
+        Pyinstrument().load_history()
+
+    ps = Pyinstrument(output_folder=tmp_path)
+    for _ in range(2):
+        with ps.profile(name="foo", filename="foo.json"):
+            fib(10)
+    assert len(ps._history) == 1
+
+    manifest = tmp_path / MANIFEST_NAME
+    (record,) = map(json.loads, manifest.read_text(encoding="utf-8").splitlines())
+    manifest.write_text(json.dumps({**record, "new_field": 1}), encoding="utf-8")
+
+    ps2 = Pyinstrument()
+    ps2.load_history(tmp_path)
+    assert ps2._history == ps._history
+
+
+def test_pyinstrument_diff(tmp_path: Path) -> NoReturn:
+    """Verify archived profiles can be compared."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path)
+    for n in [12, 16]:
+        with ps.profile(name=f"fib-{n}", interval=0.0001):
+            fib(n)
+
+    diff = ps.diff(*ps._history)
+    assert diff.name == "fib-12 vs fib-16"
+    regressions, improvements = diff.parsed()["profiles"]
+    assert regressions["samples"]
+
+
+def test_pyinstrument_merge(tmp_path: Path) -> NoReturn:
+    """Verify archived runs can be merged."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path)
+    for i in range(3):
+        with ps.profile(name=f"run-{i}", interval=0.0001):
+            fib(14)
+
+    merged = ps.merge(ps._history, name="fib")
+    doc = merged.parsed()
+    assert len(doc["ipyprofiler"]["frame_stats"]) == len(doc["shared"]["frames"])
+    assert "mean of 3 runs" in doc["profiles"][0]["name"]
+
+
+def test_pyinstrument_benchmark(tmp_path: Path) -> NoReturn:
+    """Verify repeated runs are timed, and profiled runs merged."""
+    import json
+
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(output_folder=tmp_path, interval=0.0001)
+    calls = []
+
+    def work() -> None:
+        calls.append(fib(15))
+
+    result = ps.benchmark(work, repeat=5, warmup=2, profile_repeat=3, name="bench")
+    assert len(calls) == 10
+    assert len(result.times) == 5
+    assert result.profiled == 3
+    assert result.best <= result.median <= max(result.times)
+    assert min(result.profiled_times) <= result.profiled_mean
+    assert "of 5 runs, 2 warmup), " in str(result)
+    assert "per profiled loop (mean of 3 runs)" in str(result)
+
+    doc = json.loads(ps._profile.value)
+    assert doc["name"] == "bench"
+    timings = doc["ipyprofiler"]["timings"]
+    assert timings["times"] == result.times
+    assert timings["profiled_times"] == result.profiled_times
+    assert "frame_stats" in doc["ipyprofiler"]
+    assert len(ps._history) == 1
+    assert ps.timings.startswith("min ")
+    assert ps.timings.endswith(" of 5 runs")
+    assert ps._history[0].timings == ps.timings
+    assert ps._history[0].label == f"bench ({ps.timings})"
+
+    ui = ps.ui()
+    meta = ui.children[1]
+    assert meta.children[1].value == ps.timings
+    assert meta.layout.display == "flex"
+    with ps.profile(name="plain"):
+        fib(10)
+    assert not ps.timings
+    assert meta.children[1].value == ""
+
+    with ps.profile(), pytest.raises(RuntimeError, match="while profiling"):
+        ps.benchmark(work, repeat=1)
+    assert not ps._profiler.is_running
+
+
+def test_pyinstrument_magic() -> NoReturn:
+    """Verify the cell magic benchmarks a cell with a named profiler."""
+    from IPython.core.interactiveshell import InteractiveShell
+
+    from ipyprofiler import Pyinstrument
+
+    shell = InteractiveShell.instance()
+    shell.run_line_magic("load_ext", "ipyprofiler")
+    ps = shell.user_ns["ps"] = Pyinstrument()
+    shell.user_ns["total"] = 0
+    result = shell.run_cell_magic(
+        "ipyprofile", "-n 3 -w 1 -o --name magic ps", "total += 1"
+    )
+    assert shell.user_ns["total"] == 5
+    assert len(result.times) == 3
+    assert '"name": "magic"' in ps._profile.value
@@ -0,0 +1,160 @@
+"""Tests of ``AllThreads``."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import NoReturn
+
+
+def spin(stop: threading.Event) -> None:
+    """Keep a thread busy until stopped."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_all_threads() -> NoReturn:
+    """Verify each thread gets a profile, with shared frames."""
+    from ipyprofiler import AllThreads
+
+    at = AllThreads(interval=0.001)
+    stop = threading.Event()
+    worker = threading.Thread(target=spin, args=[stop], name="spinner")
+    worker.start()
+    try:
+        with at.profile(name="threads"):
+            time.sleep(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    doc = json.loads(at._profile.value)
+    names = [p["name"] for p in doc["profiles"]]
+    assert len(names) >= 2
+    assert any(name.startswith("threads: spinner") for name in names)
+    assert not any("ipyprofiler-sampler" in name for name in names)
+    assert at.sample_count > 0
+
+    frames = [f["name"] for f in doc["shared"]["frames"]]
+    (spinner,) = [p for p in doc["profiles"] if "spinner" in p["name"]]
+    assert any(frames[s[-1]] == "spin" for s in spinner["samples"])
+    assert spinner["endValue"] > 0
+
+
+def test_all_threads_background_main_thread() -> NoReturn:
+    """Verify ``sample_count`` is set on the event loop thread, with the profile."""
+    from ipyprofiler import AllThreads
+
+    at = AllThreads(interval=0.001, background=True)
+    threads = []
+    at.observe(lambda _: threads.append(threading.get_ident()), "sample_count")
+
+    async def run() -> None:
+        with at.profile(name="threads"):
+            end = time.perf_counter() + 0.05
+            while time.perf_counter() < end:
+                sum(range(1000))
+        assert at.sample_count == 0
+        for _ in range(1000):
+            if not at.pending:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert at.sample_count > 0
+    assert threads == [threading.get_ident()]
+
+
+def test_stack_sampler_stop() -> NoReturn:
+    """Verify a stopped sampler keeps its samples, but no code objects."""
+    from ipyprofiler.sampler import StackSampler
+
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    assert sampler.sample_count > 0
+    assert sampler.to_document()["profiles"]
+    assert sampler.frames
+    assert not sampler._frame_ids
+
+    sampler.interval = 10
+    sampler.start()
+    sampler.stop()
+    assert sampler.sample_count == 0
+    assert not sampler.frames
+    assert not sampler.threads
+
+
+def test_continuous() -> NoReturn:
+    """Verify a continuous profile is published, with bounded memory."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(refresh_interval=0.05, window=10, max_samples=20)
+    old_value = ps._profile.value
+    ps.continuous = True
+    sampler = ps._sampler
+    deadline = time.time() + 0.3
+    while time.time() < deadline:
+        sum(range(1000))
+    ps.continuous = False
+
+    assert ps._sampler is None
+    assert not sampler.is_running
+    assert len(sampler.buffer) == 20
+    assert sampler.sample_count > 20
+    assert 0 < ps.sampler_overhead < 1
+    assert ps._profile.value != old_value
+    doc = json.loads(ps._profile.value)
+    frames = [f["name"] for f in doc["shared"]["frames"]]
+    assert "test_continuous" in frames
+    assert len(frames) <= len(sampler.frames)
+
+
+def short_lived() -> None:
+    """Keep a thread busy briefly."""
+    deadline = time.time() + 0.05
+    while time.time() < deadline:
+        sum(range(1000))
+
+
+def test_rolling_sampler_evicts() -> NoReturn:
+    """Verify threads and frames are evicted with the samples which used them."""
+    from ipyprofiler.sampler import RollingSampler
+
+    sampler = RollingSampler(interval=0.001, window=0.05, refresh_interval=0.01)
+    sampler.start()
+    try:
+        worker = threading.Thread(target=short_lived, name="short-lived")
+        worker.start()
+        worker.join()
+        time.sleep(0.3)
+    finally:
+        sampler.stop()
+
+    assert worker.ident not in sampler.threads
+    assert "short_lived" not in [f["name"] for f in sampler.frames]
+    doc = sampler.window_document()
+    assert not any("short-lived" in p["name"] for p in doc["profiles"])
+
+
+def test_continuous_event_loop() -> NoReturn:
+    """Verify continuous windows are published on the event loop thread."""
+    from ipyprofiler import Pyinstrument
+
+    ps = Pyinstrument(refresh_interval=0.02, window=10)
+    threads = []
+    ps._profile.observe(lambda _: threads.append(threading.get_ident()), "value")
+
+    async def run() -> None:
+        ps.continuous = True
+        for _ in range(10):
+            sum(range(1000))
+            await asyncio.sleep(0.02)
+        ps.continuous = False
+
+    asyncio.run(run())
+    assert len(threads) > 1
+    assert set(threads) == {threading.get_ident()}
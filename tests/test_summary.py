@@ -0,0 +1,64 @@
+"""Tests of ``Summary``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, NoReturn
+
+if TYPE_CHECKING:
+    from ipyprofiler import Summary
+
+import pytest
+
+from .conftest import synthetic_profile
+
+
+@pytest.fixture
+def a_summary() -> Summary:
+    """Provide a summary."""
+    from ipyprofiler import Summary
+
+    return Summary()
+
+
+def test_summary_defaults(a_summary: Summary) -> NoReturn:
+    """Verify the simple profile is summarized."""
+    sm = a_summary
+    assert sm.row_count == 4
+    assert sm.page_count == 1
+    rows = sm.rows()
+    assert [r["name"] for r in rows] == ["b", "c", "d", "a"]
+    assert rows[1]["calls"] == 2
+    assert rows[1]["fraction"] == pytest.approx(5 / 14)
+    assert "35.7%" in sm.table.value
+
+
+def test_summary_pages(a_summary: Summary) -> NoReturn:
+    """Verify only one page of a large profile is rendered."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.constants import SummaryColumn
+
+    sm = a_summary
+    sm.page_size = 10
+    sm.profile = ProfileJSON(value=json.dumps(synthetic_profile(5000, sampled=True)))
+    assert sm.row_count == 5000
+    assert sm.page_count == 500
+    assert sm.table.value.count("<tr>") == 11
+    assert "<td>f4999</td>" in sm.table.value
+
+    sm.page = 3
+    assert "<td>f4969</td>" in sm.table.value
+    assert "31 to 40 of 5,000" in sm.controls.children[4].value
+
+    sm.filter = "m3.py"
+    assert sm.page == 0
+    assert sm.row_count == 714
+    assert "<td>f4994</td>" in sm.table.value
+
+    sm.sort_by = SummaryColumn.name
+    sm.ascending = True
+    assert sm.rows()[0]["name"] == "f10"
+
+    sm.profile.value = json.dumps(synthetic_profile(3, sampled=True))
+    assert sm.row_count == 0
+    assert sm.table.value.count("<tr>") == 1
@@ -0,0 +1,145 @@
+"""Tests of ``ProfileTable``."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, NoReturn
+
+import pytest
+
+from .conftest import synthetic_profile
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_table_callgraph(seed: int) -> NoReturn:
+    """Verify the columnar callgraph matches the event-walking one."""
+    from ipyprofiler.callgraph import build_callgraph
+    from ipyprofiler.table import ProfileTable
+
+    doc = synthetic_profile(20, 2000, seed=seed)
+    expected = build_callgraph(doc)
+    observed = ProfileTable.from_document(doc).to_callgraph()
+
+    for key in ["nodes", "edges", "groups"]:
+        assert len(observed[key]) == len(expected[key])
+        for obs, exp in zip(observed[key], expected[key]):
+            assert obs == pytest.approx(exp)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_table_profile_json(seed: int) -> NoReturn:
+    """Verify ``ProfileJSON`` builds callgraphs and summaries from one table."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.callgraph import build_callgraph, summarize_frames
+
+    doc = synthetic_profile(20, 2000, seed=seed)
+    pj = ProfileJSON(value=json.dumps(doc))
+    graph = pj.to_callgraph()
+    rows = pj.to_summary()
+    assert "table-0" in pj._cache
+
+    for observed, expected in [
+        (graph["nodes"], build_callgraph(doc)["nodes"]),
+        (graph["edges"], build_callgraph(doc)["edges"]),
+        (rows, summarize_frames(doc)),
+    ]:
+        assert len(observed) == len(expected)
+        for obs, exp in zip(observed, expected):
+            assert obs == pytest.approx(exp)
+
+
+def test_table_profile_json_fallback() -> NoReturn:
+    """Verify unbalanced, sampled and merged profiles are aggregated in Python."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.callgraph import build_callgraph
+
+    doc = synthetic_profile(20, 100)
+    events = doc["profiles"][0]["events"]
+    del events[-1]
+    doc["profiles"] += [{"type": "evented", "events": events[1:]}]
+    doc["profiles"] += [{"type": "sampled", "samples": [[0, 1]], "weights": [1]}]
+    pj = ProfileJSON(value=json.dumps(doc))
+
+    for profile_index in [0, 1, 2, -1]:
+        expected = build_callgraph(doc, profile_index)
+        assert pj.to_callgraph(profile_index) == expected
+    assert not pj.to_table().balanced
+    with pytest.raises(ValueError, match="no matching open"):
+        pj.to_table(1)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_table_diff(seed: int, monkeypatch: pytest.MonkeyPatch) -> NoReturn:
+    """Verify stacks are diffed the same from tables as by walking events."""
+    from ipyprofiler import diff
+
+    before = synthetic_profile(20, 2000, seed=seed)
+    after = synthetic_profile(20, 2000, seed=seed + 10)
+    # a duplicate frame is aligned with the original
+    before["shared"]["frames"] += [dict(before["shared"]["frames"][0])]
+    before["profiles"][0]["events"][0]["frame"] = 20
+
+    def _stacks(doc: dict[str, Any]) -> list[dict[tuple[str, ...], float]]:
+        names = [f["name"] for f in doc["shared"]["frames"]]
+        # ignore rounding error in unchanged stacks
+        return [
+            {
+                tuple(names[i] for i in stack): weight
+                for stack, weight in zip(profile["samples"], profile["weights"])
+                if weight > 1e-9
+            }
+            for profile in doc["profiles"]
+        ]
+
+    observed = _stacks(diff.diff_documents(before, after))
+    monkeypatch.setattr(diff, "_tables", lambda *_: None)
+    expected = _stacks(diff.diff_documents(before, after))
+
+    for obs, exp in zip(observed, expected):
+        assert obs.keys() == exp.keys()
+        assert [obs[key] for key in exp] == pytest.approx([*exp.values()])
+
+
+def test_table_diff_cached() -> NoReturn:
+    """Verify ``diff_profiles`` reuses the tables cached on each profile."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.diff import diff_profiles
+
+    before = ProfileJSON(value=json.dumps(synthetic_profile(20, 500, seed=0)))
+    after = ProfileJSON(value=json.dumps(synthetic_profile(20, 500, seed=1)))
+    table = before.to_table()
+    diff_profiles(before, after)
+    assert before.to_table() is table
+    assert "table-0" in after._cache
+
+
+def test_table_simple() -> NoReturn:
+    """Verify per-frame statistics of the simple profile."""
+    from ipyprofiler import ProfileJSON
+    from ipyprofiler.constants import SPEEDSCOPE_SIMPLE_JSON
+
+    pj = ProfileJSON(value=SPEEDSCOPE_SIMPLE_JSON)
+    table = pj.to_table()
+    assert pj.to_table() is table
+    assert table.frame.dtype.name == "int32"
+    assert table.at.dtype.name == "float64"
+    assert table.kind.dtype.name == "uint8"
+    assert table.call_depth.tolist() == [0, 1, 2, 2, 2]
+    assert [f["name"] for f in table.top(2)] == ["b", "c"]
+    assert table.top(1, by="calls")[0] == {
+        "name": "c",
+        "time": 5,
+        "self_time": 5,
+        "calls": 2,
+    }
+
+
+def test_table_sampled() -> NoReturn:
+    """Verify sampled profiles are rejected."""
+    from ipyprofiler.table import ProfileTable
+
+    doc = {"profiles": [{"type": "sampled", "samples": [], "weights": []}]}
+    with pytest.raises(ValueError, match="only evented"):
+        ProfileTable.from_document(json.loads(json.dumps(doc)))
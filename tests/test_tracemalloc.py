@@ -0,0 +1,74 @@
+"""Tests of ``Tracemalloc``."""
+
+from __future__ import annotations
+
+import json
+import tracemalloc
+from typing import TYPE_CHECKING, List, NoReturn
+
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+N_ITEMS = 100_000
+
+
+def allocate() -> List[int]:
+    """Allocate a large list."""
+    return list(range(N_ITEMS))
+
+
+@pytest.mark.parametrize("already_tracing", [False, True])
+def test_tracemalloc_widget(tmp_path: Path, already_tracing: bool) -> NoReturn:
+    """Verify allocations are weighted by bytes and attributed to their lines."""
+    from ipyprofiler import Tracemalloc
+    from ipyprofiler.constants import EXTRAS_KEY
+
+    tm = Tracemalloc(output_folder=tmp_path)
+    kept = None
+
+    if already_tracing:
+        tracemalloc.start()
+    try:
+        with tm.profile(name="alloc"):
+            kept = allocate()
+        assert tracemalloc.is_tracing() == already_tracing
+    finally:
+        tracemalloc.stop()
+
+    assert len(kept) == N_ITEMS
+    doc = json.loads(tm._profile.value)
+    (profile,) = doc["profiles"]
+    assert profile["unit"] == "bytes"
+    assert profile["endValue"] > N_ITEMS * 8
+    assert tm.peak_bytes >= profile["endValue"]
+    assert doc[EXTRAS_KEY]["peak_bytes"] == tm.peak_bytes
+    names = [f["name"] for f in doc["shared"]["frames"]]
+    assert "return list(range(N_ITEMS))" in names
+    assert len(tm._history) == 1
+
+
+def test_tracemalloc_background_main_thread() -> NoReturn:
+    """Verify ``peak_bytes`` is set on the event loop thread, with the profile."""
+    import asyncio
+    import threading
+
+    from ipyprofiler import Tracemalloc
+
+    tm = Tracemalloc(background=True)
+    threads = []
+    tm.observe(lambda _: threads.append(threading.get_ident()), "peak_bytes")
+
+    async def run() -> None:
+        with tm.profile(name="alloc"):
+            allocate()
+        assert tm.peak_bytes == 0
+        for _ in range(1000):
+            if not tm.pending:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert tm.peak_bytes > N_ITEMS * 8
+    assert threads == [threading.get_ident()]